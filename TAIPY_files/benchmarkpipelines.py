@@ -0,0 +1,175 @@
+import argparse
+import os
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import dataloader
+from dataloader import csv_files, load_csv, load_table, sales_files
+from distinctcount import DistinctCounter
+from starschema import build_sales_fact, load_dimensions
+
+# Synthetic copies of Sales/Returns are written here, one folder per scale factor, and reused
+BENCHMARK_DIR = os.path.join(dataloader.CACHE_DIR, "benchmark")
+fact_sources = sales_files + ["returns"]
+
+
+# Step 1: Synthetic data at N x the bundled volume. Every copy keeps the real product, customer and
+# territory keys (so the key distributions match), gets its own order numbers, and moves each row to
+# a random day of its original month, so the monthly shape is preserved.
+def _jitter_within_month(dates, rng):
+    month_start = dates.dt.to_period("M").dt.start_time
+    offset = (rng.random(len(dates)) * dates.dt.days_in_month).astype("int64")
+    return month_start + pd.to_timedelta(offset, unit="D")
+
+
+def generate_synthetic(scale, directory, seed=0):
+    os.makedirs(directory, exist_ok=True)
+    paths = {name: os.path.join(directory, os.path.basename(csv_files[name])) for name in fact_sources}
+    marker = os.path.join(directory, "complete.json")
+    if dataloader.read_json(marker) == {"scale": scale, "seed": seed}:
+        return paths
+
+    rng = np.random.default_rng(seed)
+    for name in fact_sources:
+        base = load_table(name)
+        order_numbers = None
+        if "OrderNumber" in base.columns:
+            order_numbers = base["OrderNumber"].str[2:].astype("int64")
+        for copy in range(scale):
+            frame = base.copy()
+            if order_numbers is not None:
+                frame["OrderNumber"] = "SO" + (order_numbers + copy * 1_000_000).astype(str)
+            if "OrderDate" in frame.columns:
+                lead_time = frame["OrderDate"] - frame["StockDate"]
+                frame["OrderDate"] = _jitter_within_month(frame["OrderDate"], rng)
+                frame["StockDate"] = frame["OrderDate"] - lead_time
+            else:
+                frame["ReturnDate"] = _jitter_within_month(frame["ReturnDate"], rng)
+            frame.to_csv(paths[name], mode="a" if copy else "w", header=copy == 0, index=False,
+                         date_format="%Y-%m-%d")
+    dataloader.write_json(marker, {"scale": scale, "seed": seed})
+    return paths
+
+
+# Step 2: Wall time and traced peak memory of one stage
+@contextmanager
+def stage(results, name):
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    yield
+    seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    results[name] = {
+        "seconds": round(seconds, 4),
+        "peak_bytes": peak - before,
+        "retained_bytes": current - before,
+    }
+
+
+# Step 3: The stages the dashboards run, first as the original scripts did them, then through the
+# shared star-schema model and columnar cache
+def run_pipeline(paths):
+    stages = {}
+    with stage(stages, "load_csv"):
+        sales_frames = [load_csv(paths[name], ["OrderDate", "StockDate"]) for name in sales_files]
+        returns = load_csv(paths["returns"], ["ReturnDate"])
+    with stage(stages, "concat"):
+        sales = pd.concat(sales_frames, ignore_index=True)
+    del sales_frames
+
+    product_lookup = load_table("product_lookup")
+    with stage(stages, "merge_product"):
+        merged = sales.merge(product_lookup[["ProductKey", "ProductPrice", "ProductCost"]], on="ProductKey",
+                             how="left")
+        merged["Revenue"] = merged["OrderQuantity"] * merged["ProductPrice"]
+    with stage(stages, "monthly_resample"):
+        merged.set_index("OrderDate").resample("MS").agg({"Revenue": "sum", "OrderQuantity": "sum"})
+        returns.set_index("ReturnDate").resample("MS")["ReturnQuantity"].sum()
+    with stage(stages, "nunique"):
+        merged["OrderNumber"].nunique()
+        merged.groupby(merged["OrderDate"].dt.to_period("M"))["OrderNumber"].nunique()
+    del merged
+
+    products, territories = load_dimensions()
+    with stage(stages, "star_schema"):
+        fact = build_sales_fact(sales, products, territories)
+    with stage(stages, "distinct_counter"):
+        counter = DistinctCounter(fact["OrderNumber"], fact[["StartOfMonth", "ProductKey", "CategoryName"]])
+        counter.count()
+        counter.rollup("CategoryName")
+    del fact, counter
+
+    # Columnar cache of the synthetic Sales files: first build, then the memory-mapped reload
+    cache_dir = os.path.join(os.path.dirname(paths["returns"]), "cache")
+    with stage(stages, "cache_build"):
+        for name in sales_files:
+            load_table(name, paths=paths, cache_dir=cache_dir)
+    with stage(stages, "cache_load"):
+        dataloader.load_sales(paths=paths, cache_dir=cache_dir)
+    return stages, len(sales), len(returns)
+
+
+def run_benchmark(scales, directory=BENCHMARK_DIR, seed=0):
+    tracemalloc.start()
+    results = []
+    try:
+        for scale in scales:
+            start = time.perf_counter()
+            try:
+                paths = generate_synthetic(scale, os.path.join(directory, f"{scale}x"), seed)
+                generate_seconds = time.perf_counter() - start
+                stages, sales_rows, returns_rows = run_pipeline(paths)
+            except (MemoryError, OSError, ValueError) as error:
+                # Keep the scales that did finish; a failed one is reported instead of ending the run
+                results.append({"scale": scale, "error": f"{type(error).__name__}: {error}"})
+                continue
+            results.append({
+                "scale": scale,
+                "sales_rows": sales_rows,
+                "returns_rows": returns_rows,
+                "generate_seconds": round(generate_seconds, 4),
+                "stages": stages,
+            })
+    finally:
+        tracemalloc.stop()
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def print_summary(report):
+    for result in report["results"]:
+        if "error" in result:
+            print(f"{result['scale']}x: failed ({result['error']})")
+            continue
+        print(f"{result['scale']}x: {result['sales_rows']:,} sales rows, {result['returns_rows']:,} returns rows")
+        for name, measured in result["stages"].items():
+            print(f"  {name:<18} {measured['seconds']:>9.3f} s  {measured['peak_bytes'] / 2**20:>10.1f} MiB peak")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the dashboard data pipelines on synthetic scaled-up data")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--data-dir", default=BENCHMARK_DIR)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = run_benchmark(args.scales, args.data_dir, args.seed)
+    dataloader.write_json(args.output, report)
+    print_summary(report)
+
+    # The point of the benchmark is the scaled-up data: fail when no scale above 1x ran to completion
+    if not any(result["scale"] > 1 and "error" not in result for result in report["results"]):
+        raise SystemExit("No scale above 1x ran to completion")
@@ -0,0 +1,160 @@
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from daxmeasures import evaluate_measures, load_measures
+from instrumentation import instrument, timed
+from monthlyaggregates import load_monthly_store
+from partitionstore import returns_partitions, sales_partitions
+from starschema import load_dimensions, refresh_sales_model
+from tableprovider import format_rate
+
+logger = logging.getLogger(__name__)
+
+# Seconds between background refreshes of the dashboard numbers
+REFRESH_SECONDS = float(os.environ.get("ARCHIOT_REFRESH_SECONDS", "60"))
+
+# Where the measures are computed: "pandas" (in process) or "postgres" (aggregated in the warehouse)
+BACKEND = os.environ.get("ARCHIOT_BACKEND", "pandas")
+
+# DAX measures of the report, parsed once
+report_measures = load_measures()
+
+
+# Step 1: Business metrics over the whole star-schema model
+@instrument("aggregate business metrics")
+def business_metrics(model):
+    # One plan over measures.dax: [Quantity Sold] and friends are computed once for every measure using them
+    values = evaluate_measures(model, report_measures, names=[
+        "Total Revenue", "Total Profit", "Total Orders", "Return Rate"]).iloc[0]
+    total_revenue = float(values["Total Revenue"])
+    total_profit = float(values["Total Profit"])
+    total_orders = int(values["Total Orders"])
+    return_rate = format_rate(values["Return Rate"], report_measures.alternates["Return Rate"])
+
+    return {
+        "total_revenue": total_revenue,
+        "total_profit": total_profit,
+        "total_orders": total_orders,
+        "return_rate": return_rate,
+    }
+
+
+def _trend(current, previous):
+    return (current - previous) / previous * 100 if previous else 0
+
+
+# Step 2: Current month vs previous month from the monthly aggregate frame
+def month_kpis(monthly_data):
+    latest_data = monthly_data.fillna(0).iloc[-1]
+    kpis = {
+        "monthly_revenue": float(latest_data['Total_Revenue']),
+        "monthly_orders": float(latest_data['Total_Orders']),
+        "monthly_returns": float(latest_data['Total_Returns']),
+        "prev_revenue": float(latest_data['Prev_Revenue']),
+        "prev_orders": float(latest_data['Prev_Orders']),
+        "prev_returns": float(latest_data['Prev_Returns']),
+    }
+    kpis["revenue_trend"] = _trend(kpis["monthly_revenue"], kpis["prev_revenue"])
+    kpis["orders_trend"] = _trend(kpis["monthly_orders"], kpis["prev_orders"])
+    kpis["returns_trend"] = _trend(kpis["monthly_returns"], kpis["prev_returns"])
+    return kpis
+
+
+# Current and previous month read straight from the month partitions: two Sales partitions
+# and two Returns partitions, whatever the number of years on disk
+@instrument("aggregate month window")
+def window_month_kpis():
+    latest = max(month for month in [sales_partitions.latest_month(), returns_partitions.latest_month()] if month is not None)
+    previous = latest - pd.DateOffset(months=1)
+    end = latest + pd.DateOffset(months=1)
+    months = [previous, latest]
+
+    sales = sales_partitions.scan(previous, end, columns=["OrderDate", "OrderNumber", "ProductKey", "OrderQuantity"])
+    returns = returns_partitions.scan(previous, end, columns=["ReturnDate", "ReturnQuantity"])
+
+    products = load_dimensions()[0]
+    price = products.set_index("ProductKey")["ProductPrice"].reindex(sales["ProductKey"]).fillna(0).to_numpy()
+    sales_month = sales["OrderDate"].dt.to_period("M").dt.start_time
+    revenue = pd.Series(sales["OrderQuantity"].to_numpy() * price, index=sales.index).groupby(sales_month).sum()
+    orders = sales.groupby(sales_month)["OrderNumber"].nunique()
+    quantity_returned = returns.groupby(returns["ReturnDate"].dt.to_period("M").dt.start_time)["ReturnQuantity"].sum()
+
+    frame = pd.DataFrame({
+        "Total_Revenue": revenue.reindex(months, fill_value=0).to_numpy(dtype="float64"),
+        "Total_Orders": orders.reindex(months, fill_value=0).to_numpy(dtype="float64"),
+        "Total_Returns": quantity_returned.reindex(months, fill_value=0).to_numpy(dtype="float64"),
+    }, index=months)
+    frame["Prev_Revenue"] = frame["Total_Revenue"].shift(1)
+    frame["Prev_Orders"] = frame["Total_Orders"].shift(1)
+    frame["Prev_Returns"] = frame["Total_Returns"].shift(1)
+    return month_kpis(frame)
+
+
+# Step 3: Backend-independent entry points used by the dashboards
+_monthly_store = None
+
+
+def load_business_metrics():
+    if BACKEND == "postgres":
+        from pgwarehouse import warehouse_business_metrics
+        return warehouse_business_metrics()
+    return business_metrics(refresh_sales_model())
+
+
+# Monthly frame with Month, Total_* and Prev_* columns
+def load_monthly_frame():
+    global _monthly_store
+    if BACKEND == "postgres":
+        from pgwarehouse import warehouse_monthly_frame
+        return warehouse_monthly_frame()
+    _monthly_store = load_monthly_store(store=_monthly_store)
+    return _monthly_store.monthly_frame()
+
+
+# Latest month vs previous month for the KPI cards
+def load_month_kpis():
+    if BACKEND == "postgres":
+        from pgwarehouse import warehouse_monthly_frame
+        return month_kpis(warehouse_monthly_frame())
+    return window_month_kpis()
+
+
+# Distinct orders per category, as columns categoryname, total_orders
+def load_category_orders():
+    if BACKEND == "postgres":
+        from pgwarehouse import warehouse_category_orders
+        return warehouse_category_orders()
+    category_orders = refresh_sales_model().order_counter().rollup("CategoryName").reset_index()
+    category_orders.columns = ["categoryname", "total_orders"]
+    return category_orders
+
+
+# Step 4: Push recomputed values into Taipy state variables of the same name
+def assign_values(state, values):
+    with timed("render state update", rows=len(values)):
+        for name, value in values.items():
+            state.assign(name, value)
+
+
+# Recompute once per interval in a background thread and broadcast the result to every connected client.
+# module_context names the module whose page variables are updated, when the Gui serves several modules;
+# callback(state, values) replaces the plain assignment, e.g. to re-apply each client's own filters.
+def start_periodic_refresh(gui, compute, interval=REFRESH_SECONDS, module_context=None, callback=assign_values):
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                values = compute()
+            except Exception:
+                # Keep refreshing; the next interval may succeed (e.g. a file that was being rewritten)
+                logger.exception("Dashboard refresh failed in %s", getattr(compute, "__name__", compute))
+                continue
+            gui.broadcast_callback(callback, [values], module_context)
+
+    thread = threading.Thread(target=run, name="dashboard-refresh", daemon=True)
+    thread.start()
+    return thread
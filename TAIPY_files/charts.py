@@ -0,0 +1,20 @@
+# Chart data for Taipy's built-in Plotly charts: only the aggregated series is sent to the browser,
+# nothing is rasterized or written to disk on the server
+
+# Plotly trace options equivalent to Matplotlib's ax.text(..., ha='center', va='bottom') bar labels
+bar_label_options = {"textposition": "outside", "cliponaxis": False}
+
+
+# Add a text column with the rounded value of `y`, shown on top of each bar
+def annotated_series(frame, x, y, decimals=2, label_column="label"):
+    data = frame[[x, y]].copy()
+    data[label_column] = data[y].round(decimals).map(f"{{:,.{decimals}f}}".format)
+    return data
+
+
+# Monthly revenue and orders series for the line/bar charts, with a readable month label
+def monthly_chart_data(monthly_data):
+    chart_data = annotated_series(monthly_data, "Month", "Total_Orders", decimals=0, label_column="OrdersLabel")
+    chart_data["Total_Revenue"] = monthly_data["Total_Revenue"]
+    chart_data["MonthLabel"] = monthly_data["Month"].dt.strftime("%Y-%m")
+    return chart_data
@@ -0,0 +1,194 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dataloader import get_table
+from instrumentation import instrument
+from starschema import refresh_sales_model
+
+# RFM scores run 1 (worst) to 5 (best); recency is scored so that a recent last order scores high
+RFM_BINS = 5
+
+# Frequency is scored on the order count itself: most customers order once or twice, so quantiles of
+# it collapse into two or three scores. Minimum number of orders for F = 1 .. 5.
+FREQUENCY_THRESHOLDS = [1, 2, 3, 4, 6]
+
+# Segment by recency and frequency score, checked in order (the usual RFM grid)
+rfm_segments = [
+    ("Champions", lambda r, f: (r >= 4) & (f >= 4)),
+    ("Loyal", lambda r, f: (r >= 3) & (f >= 4)),
+    ("New", lambda r, f: (r >= 4) & (f <= 1)),
+    ("Potential Loyalists", lambda r, f: (r >= 3) & (f >= 2)),
+    ("About to Sleep", lambda r, f: (r == 3) & (f <= 1)),
+    ("At Risk", lambda r, f: (r <= 2) & (f >= 3)),
+    ("Hibernating", lambda r, f: (r <= 2) & (f == 2)),
+    ("Lost", lambda r, f: (r <= 2) & (f <= 1)),
+]
+
+
+# Segment of every (R, F) cell, indexed [R - 1, F - 1]; every cell must belong to a segment
+def _segment_grid():
+    r, f = np.meshgrid(np.arange(1, RFM_BINS + 1), np.arange(1, RFM_BINS + 1), indexing="ij")
+    grid = np.full(r.shape, None, dtype=object)
+    for name, rule in rfm_segments:
+        grid[rule(r, f) & (grid == None)] = name  # noqa: E711
+    if (grid == None).any():  # noqa: E711
+        raise ValueError("rfm_segments leaves some (R, F) cells without a segment")
+    return grid
+
+
+segment_grid = _segment_grid()
+
+
+def _score(values, higher_is_better=True):
+    # Quintile of the share of customers ranked below: tied values (e.g. everyone with 1 order) share
+    # one score, whatever their CustomerKey order
+    ranks = pd.Series(values).rank(method="min", ascending=higher_is_better).to_numpy()
+    return np.floor((ranks - 1) / len(ranks) * RFM_BINS).astype("int64") + 1
+
+
+def _frequency_score(orders):
+    return np.searchsorted(FREQUENCY_THRESHOLDS, np.asarray(orders), side="right")
+
+
+def _month_index(dates):
+    return dates.dt.year.to_numpy() * 12 + dates.dt.month.to_numpy() - 1
+
+
+# Per-customer measures from the sales fact. Customers are kept sorted by CustomerKey and fact rows are
+# matched with a binary search on the int32 keys, so the join is one searchsorted instead of a merge of
+# the full customer attributes onto every sales row; all aggregates are bincounts over those positions.
+class CustomerAnalytics:
+    def __init__(self, fact, customers):
+        self.customers = customers.sort_values("CustomerKey", kind="stable").reset_index(drop=True)
+        keys = self.customers["CustomerKey"].to_numpy()
+        fact_keys = fact["CustomerKey"].to_numpy()
+        positions = np.searchsorted(keys, fact_keys)
+        positions[positions == len(keys)] = 0
+        known = keys[positions] == fact_keys if len(keys) else np.zeros(len(fact_keys), dtype=bool)
+
+        self.positions = positions[known]
+        self.unknown_rows = int((~known).sum())
+        self.order_dates = fact["OrderDate"][known].reset_index(drop=True)
+        self.order_codes = pd.factorize(fact["OrderNumber"][known])[0]
+        self.revenue = fact["Revenue"].to_numpy()[known]
+        self.profit = self.revenue - fact["Cost"].to_numpy()[known]
+        self.as_of = self.order_dates.max() + pd.Timedelta(days=1)
+
+        self._results = {}
+        # Re-entrant: rfm() and the summaries are built from other cached results
+        self._lock = threading.RLock()
+
+    def _cached(self, name, compute):
+        with self._lock:
+            if name not in self._results:
+                self._results[name] = compute()
+            return self._results[name]
+
+    # Step 1: One row per customer with at least one order
+    def customer_measures(self):
+        return self._cached("measures", self._customer_measures)
+
+    def _customer_measures(self):
+        n = len(self.customers)
+        revenue = np.bincount(self.positions, weights=self.revenue, minlength=n)
+        profit = np.bincount(self.positions, weights=self.profit, minlength=n)
+        # An order belongs to one customer, so unique (customer, order) pairs count each order once
+        pairs = np.unique(self.positions.astype(np.int64) * (self.order_codes.max() + 1) + self.order_codes)
+        orders = np.bincount(pairs // (self.order_codes.max() + 1), minlength=n)
+
+        days = self.order_dates.to_numpy().astype("datetime64[D]").astype(np.int64)
+        first = np.full(n, np.iinfo(np.int64).max)
+        last = np.full(n, np.iinfo(np.int64).min)
+        np.minimum.at(first, self.positions, days)
+        np.maximum.at(last, self.positions, days)
+
+        active = orders > 0
+        measures = self.customers.loc[active, ["CustomerKey", "FirstName", "LastName"]].reset_index(drop=True)
+        measures["CustomerName"] = (measures.pop("FirstName").astype("string").str.title() + " "
+                                    + measures.pop("LastName").astype("string").str.title())
+        measures["Orders"] = orders[active]
+        measures["Revenue"] = revenue[active]
+        measures["Profit"] = profit[active]
+        measures["FirstOrder"] = first[active].astype("datetime64[D]").astype("datetime64[ns]")
+        measures["LastOrder"] = last[active].astype("datetime64[D]").astype("datetime64[ns]")
+        return measures
+
+    # Step 2: RFM scores and segments
+    def rfm(self):
+        return self._cached("rfm", self._rfm)
+
+    def _rfm(self):
+        rfm = self.customer_measures()[["CustomerKey", "CustomerName", "Orders", "Revenue", "LastOrder"]].copy()
+        rfm["RecencyDays"] = (self.as_of - rfm["LastOrder"]).dt.days
+        rfm["R"] = _score(rfm["RecencyDays"], higher_is_better=False)
+        rfm["F"] = _frequency_score(rfm["Orders"])
+        rfm["M"] = _score(rfm["Revenue"])
+        rfm["RFM"] = rfm["R"] * 100 + rfm["F"] * 10 + rfm["M"]
+        segment = segment_grid[rfm["R"].to_numpy() - 1, rfm["F"].to_numpy() - 1]
+        rfm["Segment"] = pd.Categorical(segment, categories=[name for name, _ in rfm_segments])
+        return rfm
+
+    def segment_summary(self):
+        return self._cached("segments", lambda: self.rfm().groupby("Segment", observed=False).agg(
+            Customers=("CustomerKey", "size"),
+            Revenue=("Revenue", "sum"),
+            AvgOrders=("Orders", "mean"),
+            AvgRecencyDays=("RecencyDays", "mean"),
+        ).reset_index())
+
+    # Step 3: Share of each first-order-month cohort that ordered again n months later
+    def cohort_retention(self):
+        return self._cached("cohorts", self._cohort_retention)
+
+    def _cohort_retention(self):
+        months = _month_index(self.order_dates)
+        n = len(self.customers)
+        first_month = np.full(n, np.iinfo(np.int64).max)
+        np.minimum.at(first_month, self.positions, months)
+
+        # Active (customer, month) pairs, then the offset of each from the customer's cohort month
+        span = months.max() - months.min() + 1
+        active = np.unique(self.positions.astype(np.int64) * span + (months - months.min()))
+        customer = active // span
+        month = active % span + months.min()
+        cohort = first_month[customer]
+        offset = month - cohort
+
+        counts = pd.Series(1, index=pd.MultiIndex.from_arrays([cohort, offset], names=["Cohort", "Offset"]))
+        table = counts.groupby(level=[0, 1]).sum().unstack(fill_value=0).sort_index()
+        sizes = table[0]
+        # Months after the last order date have not happened yet for a cohort: missing, not 0%
+        observed = table.columns.to_numpy()[None, :] <= (months.max() - table.index.to_numpy())[:, None]
+        retention = table.div(sizes, axis=0).where(observed)
+        retention.index = [f"{cohort // 12}-{cohort % 12 + 1:02d}" for cohort in retention.index]
+        retention.columns = [f"M{offset}" for offset in retention.columns]
+        retention.insert(0, "Customers", sizes.to_numpy())
+        return retention.rename_axis("Cohort").reset_index()
+
+    # Step 4: Top customers by a measure
+    def top_customers(self, by="Revenue", limit=20):
+        return self.customer_measures().nlargest(limit, by).reset_index(drop=True)
+
+
+# Step 5: Built once per refresh: reused until the sales model or the Customer Lookup is reloaded
+_analytics = None
+_analytics_sources = None
+_analytics_lock = threading.Lock()
+
+
+@instrument("build customer analytics", rows=lambda analytics: len(analytics.customers))
+def build_customer_analytics(model, customers):
+    return CustomerAnalytics(model.fact, customers)
+
+
+def load_customer_analytics():
+    global _analytics, _analytics_sources
+    model = refresh_sales_model()
+    customers = get_table("customer")
+    with _analytics_lock:
+        if _analytics is None or _analytics_sources[0] is not model or _analytics_sources[1] is not customers:
+            _analytics = build_customer_analytics(model, customers)
+            _analytics_sources = (model, customers)
+        return _analytics
@@ -0,0 +1,257 @@
+import codecs
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from datasources import dataset_paths, datasets, registry
+from instrumentation import timed
+from tableschema import apply_schema, read_dtypes
+
+# pyarrow is optional: without it every load falls back to parsing the CSV
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    feather = None
+
+# Step 1: Location of the data files, from the source registry (datasources.toml + environment overrides)
+csv_files = dataset_paths(kind="csv")
+
+sales_files = sorted(datasets(group="sales"))
+
+# Spreadsheets are slow to parse, so they are converted to the columnar cache once like the CSVs
+excel_files = dataset_paths(kind="excel")
+
+# Wide files (one value column per region) are melted to long format in chunks, see widereshape.py
+wide_files = dataset_paths(kind="wide")
+
+# Predictive-maintenance sensor readings; these grow without bound and are streamed, not cached
+sensor_files = dataset_paths(kind="sensor")
+
+# Date columns are parsed once, when the cache is built, instead of in every dashboard
+date_columns = {name: entry["parse_dates"] for name, entry in registry.items() if entry["parse_dates"]}
+
+# Compact column types (downcast keys, categoricals, dictionary-encoded OrderNumber), applied once
+# when the cache is built; see tableschema.py and the [schemas.*] sections of datasources.toml
+table_schemas = {name: entry["schema"] for name, entry in registry.items() if entry["schema"]}
+
+# Threads used to load the partitions of a folder such as Sales Data side by side
+LOAD_WORKERS = int(os.environ.get("ARCHIOT_LOAD_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+# Columnar cache lives next to the scripts; one Arrow file plus a small JSON manifest per table
+CACHE_DIR = os.environ.get(
+    "ARCHIOT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+
+
+# Pick the encoding with a cheap incremental decode so the file is only parsed once
+def detect_encoding(file_path, chunk_size=1 << 20):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(file_path, "rb") as f:
+        try:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    decoder.decode(b"", final=True)
+                    return "utf-8-sig"
+                decoder.decode(chunk)
+        except UnicodeDecodeError:
+            return "ISO-8859-1"
+
+
+def load_csv(file_path, parse_dates=None, dtypes=None):
+    df = pd.read_csv(file_path, encoding=detect_encoding(file_path), dtype=dtypes)
+    for column in parse_dates or []:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], errors="coerce")
+    return df
+
+
+# `paths` maps source names to files that replace the registered ones (e.g. the benchmark's synthetic copies)
+def source_path(name, paths=None):
+    if paths and name in paths:
+        return paths[name]
+    for files in (csv_files, excel_files, wide_files):
+        if name in files:
+            return files[name]
+    raise KeyError(f"Unknown data source '{name}'")
+
+
+def read_source(name, parse_dates=None, path=None):
+    path = path or source_path(name)
+    schema = table_schemas.get(name)
+    if name in excel_files:
+        return apply_schema(pd.read_excel(path), schema)
+    return apply_schema(load_csv(path, parse_dates, read_dtypes(schema)), schema)
+
+
+def file_hash(file_path, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_paths(name, cache_dir=None):
+    cache_dir = cache_dir or CACHE_DIR
+    return (
+        os.path.join(cache_dir, f"{name}.arrow"),
+        os.path.join(cache_dir, f"{name}.json"),
+    )
+
+
+def read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_atomic(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_json(path, data):
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    write_atomic(path, write)
+
+
+# The cache is valid when the source mtime/size still match, or when the content hash does,
+# and it was built with the schema currently configured for the table
+def _cache_is_fresh(source_path, cache_path, manifest_path, schema=None):
+    manifest = read_json(manifest_path)
+    if manifest is None or not os.path.exists(cache_path):
+        return False
+    if manifest.get("schema") != schema:
+        return False
+    stat = os.stat(source_path)
+    if manifest["mtime_ns"] == stat.st_mtime_ns and manifest["size"] == stat.st_size:
+        return True
+    if manifest["size"] != stat.st_size or manifest["sha1"] != file_hash(source_path):
+        return False
+    # Touched but unchanged: remember the new mtime so the hash is not recomputed next time
+    manifest["mtime_ns"] = stat.st_mtime_ns
+    write_json(manifest_path, manifest)
+    return True
+
+
+def _build_cache(name, source_path, cache_path, manifest_path):
+    df = read_source(name, date_columns.get(name), source_path)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Uncompressed so later reads can memory-map the file instead of decoding it
+    write_atomic(cache_path, lambda tmp_path: feather.write_feather(table, tmp_path, compression="uncompressed"))
+    stat = os.stat(source_path)
+    write_json(manifest_path, {
+        "source": source_path,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha1": file_hash(source_path),
+        "schema": table_schemas.get(name),
+    })
+    return df
+
+
+# (mtime, size) of each source, cheap enough to poll for changes
+def source_signature(names):
+    signature = []
+    for name in names:
+        stat = os.stat(source_path(name))
+        signature.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+# Step 2: Load one table, from the columnar cache when possible
+def load_table(name, use_cache=True, paths=None, cache_dir=None):
+    with timed(f"load {name}") as record:
+        table = _load_table(name, use_cache, paths, cache_dir)
+        record["rows"] = len(table)
+    return table
+
+
+def _load_table(name, use_cache, paths=None, cache_dir=None):
+    path = source_path(name, paths)
+    if not use_cache or pa is None:
+        return read_source(name, date_columns.get(name), path)
+
+    cache_path, manifest_path = _cache_paths(name, cache_dir)
+    if _cache_is_fresh(path, cache_path, manifest_path, table_schemas.get(name)):
+        return feather.read_table(cache_path, memory_map=True).to_pandas(split_blocks=True)
+    return _build_cache(name, path, cache_path, manifest_path)
+
+
+# Same as load_table but returns the memory-mapped Arrow table, building the cache first if needed
+def load_arrow_table(name, paths=None, cache_dir=None):
+    with timed(f"load {name}") as record:
+        path = source_path(name, paths)
+        cache_path, manifest_path = _cache_paths(name, cache_dir)
+        if not _cache_is_fresh(path, cache_path, manifest_path, table_schemas.get(name)):
+            _build_cache(name, path, cache_path, manifest_path)
+        table = feather.read_table(cache_path, memory_map=True)
+        record["rows"] = table.num_rows
+    return table
+
+
+def load_tables(*names, use_cache=True):
+    return {name: load_table(name, use_cache=use_cache) for name in names}
+
+
+# Tables loaded on first use and shared by every page in the process; reloaded when the source changes
+_shared_tables = {}
+_shared_lock = threading.Lock()
+
+
+def get_table(name):
+    signature = source_signature([name])
+    with _shared_lock:
+        cached = _shared_tables.get(name)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+    table = load_table(name)
+    with _shared_lock:
+        _shared_tables[name] = (signature, table)
+    return table
+
+
+# Step 3: All partitions of a group (every year of Sales Data) combined into one frame.
+# Partitions load in a thread pool: CSV parsing and Arrow reads release the GIL, and threads hand
+# the results back without pickling them between processes. With the cache the partitions stay
+# Arrow tables, concat_tables only chains their chunks, and the single to_pandas call is the one
+# copy into the combined frame, so there is no second copy for pd.concat.
+# pandas stores category codes as int8/int16/int32 depending on the number of values in each file, so the
+# cached partitions of one table can disagree on the dictionary index type; cast them all to int32 first
+def concat_arrow_tables(tables):
+    fields = [pa.field(field.name, pa.dictionary(pa.int32(), field.type.value_type, field.type.ordered))
+              if pa.types.is_dictionary(field.type) else field for field in tables[0].schema]
+    schema = pa.schema(fields, metadata=tables[0].schema.metadata)
+    return pa.concat_tables([table.cast(schema) for table in tables])
+
+
+def load_partitions(names, use_cache=True, workers=LOAD_WORKERS, paths=None, cache_dir=None):
+    with timed(f"load {len(names)} partitions") as record:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(names)))) as pool:
+            if use_cache and pa is not None:
+                tables = list(pool.map(lambda name: load_arrow_table(name, paths, cache_dir), names))
+                combined = concat_arrow_tables(tables).to_pandas(split_blocks=True)
+            else:
+                frames = list(pool.map(lambda name: load_table(name, use_cache=False, paths=paths), names))
+                # Categoricals with different dictionaries concatenate to object; encode them again
+                combined = apply_schema(pd.concat(frames, ignore_index=True), table_schemas.get(names[0]))
+        record["rows"] = len(combined)
+    return combined
+
+
+def load_sales(use_cache=True, paths=None, cache_dir=None):
+    return load_partitions(sales_files, use_cache=use_cache, paths=paths, cache_dir=cache_dir)
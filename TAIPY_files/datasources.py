@@ -0,0 +1,95 @@
+import glob
+import os
+import re
+
+# tomllib is in the standard library from Python 3.11; older interpreters can use the tomli package
+try:
+    import tomllib
+except ImportError:
+    import tomli as tomllib
+
+SOURCES_CONFIG = os.environ.get(
+    "ARCHIOT_SOURCES_CONFIG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "datasources.toml")
+)
+
+
+def _env_name(prefix, name):
+    return f"{prefix}{name.upper()}"
+
+
+def _entry(path, entry, schemas, kind="csv", group=None):
+    schema = schemas[entry["schema"]] if "schema" in entry else None
+    return {
+        "path": path,
+        "kind": entry.get("kind", kind),
+        "group": entry.get("group", group),
+        "parse_dates": list(entry.get("parse_dates", [])) + list((schema or {}).get("dates", [])),
+        "schema": schema,
+        "unpivot": entry.get("unpivot"),
+    }
+
+
+# Files of a partitioned folder matching the pattern, keyed by what the wildcards matched:
+# "AdventureWorks Sales Data *.csv" -> "2021", "*/sales_*.csv" -> "2023_01"
+def discover_partitions(directory, pattern):
+    parts = [re.escape(part) for part in pattern.replace("\\", "/").split("*")]
+    matcher = re.compile("([^/]*)".join(parts) + "$")
+    partitions = {}
+    for path in glob.glob(os.path.join(directory, pattern)):
+        match = matcher.match(os.path.relpath(path, directory).replace(os.sep, "/"))
+        if match:
+            key = "_".join(re.sub(r"\W+", "_", value).strip("_").lower() for value in match.groups())
+            partitions[key] = os.path.normpath(path)
+    return dict(sorted(partitions.items()))
+
+
+# Step 1: Read the registry: dataset name -> path, kind, group, date columns and schema
+def load_registry(config_path=SOURCES_CONFIG):
+    with open(config_path, "rb") as f:
+        config = tomllib.load(f)
+    base = os.path.dirname(os.path.abspath(config_path))
+
+    directories = {}
+    for name, directory in config.get("directories", {}).items():
+        directory = os.environ.get(_env_name("ARCHIOT_DIR_", name), directory)
+        directories[name] = os.path.normpath(os.path.join(base, os.path.expanduser(directory)))
+
+    schemas = config.get("schemas", {})
+    sections = list(config.get("datasets", {}).items()) + list(config.get("partitions", {}).items())
+    for name, entry in sections:
+        if "schema" in entry and entry["schema"] not in schemas:
+            raise ValueError(f"'{name}' refers to unknown schema '{entry['schema']}' in {config_path}")
+
+    registry = {}
+    for name, entry in config.get("datasets", {}).items():
+        if "directory" in entry and entry["directory"] not in directories:
+            raise ValueError(f"Dataset '{name}' refers to unknown directory '{entry['directory']}' in {config_path}")
+        path = os.path.join(directories[entry["directory"]], entry["file"]) if "directory" in entry else entry["file"]
+        path = os.environ.get(_env_name("ARCHIOT_SOURCE_", name), path)
+        registry[name] = _entry(os.path.normpath(os.path.join(base, path)), entry, schemas)
+
+    # Step 2: Partitioned folders. Every matching file becomes a dataset "<group>_<key>" in that group,
+    # so a new year (or month) is picked up by dropping its file into the folder
+    for group, entry in config.get("partitions", {}).items():
+        if entry["directory"] not in directories:
+            raise ValueError(f"Partitions '{group}' refer to unknown directory '{entry['directory']}' in {config_path}")
+        for key, path in discover_partitions(directories[entry["directory"]], entry["pattern"]).items():
+            name = f"{group}_{key}"
+            path = os.environ.get(_env_name("ARCHIOT_SOURCE_", name), path)
+            registry[name] = _entry(os.path.normpath(os.path.join(base, path)), entry, schemas, group=group)
+    return registry
+
+
+registry = load_registry()
+
+
+def datasets(kind=None, group=None):
+    return [
+        name for name, entry in registry.items()
+        if (kind is None or entry["kind"] == kind) and (group is None or entry["group"] == group)
+    ]
+
+
+def dataset_paths(kind=None, group=None):
+    return {name: registry[name]["path"] for name in datasets(kind, group)}
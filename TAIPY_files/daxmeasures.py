@@ -0,0 +1,520 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrument
+
+# Measure definitions ported from the Power BI reports, one "Name = expression" per line
+MEASURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "measures.dax")
+
+# Tables of the star-schema model as they are named in DAX. Facts hold the rows; lookups are reached
+# through the key the fact tables carry; the calendar is derived from each fact's date column.
+fact_tables = {"Sales Data": "fact", "Returns Data": "returns"}
+lookup_tables = {
+    "Product Lookup": ("products", "ProductKey"),
+    "Product Subcategories Lookup": ("products", "ProductKey"),
+    "Product Categories Lookup": ("products", "ProductKey"),
+    "Territory Lookup": ("territories", "TerritoryKey"),
+}
+calendar_table = "Calendar Lookup"
+fact_dates = {"Sales Data": "OrderDate", "Returns Data": "ReturnDate"}
+
+supported_functions = {"SUMX", "SUM", "DISTINCTCOUNT", "COUNTROWS", "DIVIDE", "CALCULATE", "RELATED", "DATE"}
+comparison_operators = {"=", "<>", "<", "<=", ">", ">="}
+
+
+class DaxError(ValueError):
+    pass
+
+
+# Step 1: Tokenize and parse the DAX subset into hashable tuples, so equal subexpressions are equal keys
+#   ("num", value) ("str", text) ("measure", name) ("col", table, column) ("call", NAME, args)
+#   ("bin", op, left, right) ("neg", expr) ("list", items)
+_token = re.compile(r"""
+    \s*(?:
+        (?P<table>'(?:[^']|'')*')
+      | (?P<bracket>\[[^\]]*\])
+      | (?P<string>"(?:[^"]|"")*")
+      | (?P<number>\d+(?:\.\d+)?)
+      | (?P<name>[A-Za-z_][A-Za-z0-9_.]*)
+      | (?P<op><=|>=|<>|&&|\|\||[=<>+\-*/(),{}])
+    )""", re.VERBOSE)
+
+
+def tokenize(text):
+    tokens, position = [], 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _token.match(text, position)
+        if match is None:
+            raise DaxError(f"Unexpected character at {position}: {text[position:position + 20]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "table":
+            value = value[1:-1].replace("''", "'")
+        elif kind == "bracket":
+            value = value[1:-1]
+        elif kind == "string":
+            value = value[1:-1].replace('""', '"')
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.position = 0
+
+    def peek(self, value=None):
+        if self.position >= len(self.tokens):
+            return None
+        token = self.tokens[self.position]
+        return token if value is None or token[1] == value else None
+
+    def take(self, value=None):
+        token = self.peek()
+        if token is None or (value is not None and token[1] != value):
+            found = repr(token[1]) if token else "the end of the expression"
+            raise DaxError(f"Expected {repr(value) if value else 'an expression'} but found {found}")
+        self.position += 1
+        return token
+
+    def parse(self):
+        expression = self.expression()
+        if self.peek() is not None:
+            raise DaxError(f"Unexpected {self.peek()[1]!r}")
+        return expression
+
+    def expression(self):
+        return self.binary(["||"], lambda: self.binary(["&&"], self.comparison))
+
+    def binary(self, operators, operand):
+        left = operand()
+        while self.peek() and self.peek()[0] == "op" and self.peek()[1] in operators:
+            op = self.take()[1]
+            left = ("bin", op, left, operand())
+        return left
+
+    def comparison(self):
+        left = self.additive()
+        token = self.peek()
+        if token and token[0] == "op" and token[1] in comparison_operators:
+            op = self.take()[1]
+            return ("bin", op, left, self.additive())
+        if token and token[0] == "name" and token[1].upper() == "IN":
+            self.take()
+            return ("bin", "IN", left, self.primary())
+        return left
+
+    def additive(self):
+        return self.binary(["+", "-"], self.multiplicative)
+
+    def multiplicative(self):
+        return self.binary(["*", "/"], self.unary)
+
+    def unary(self):
+        if self.peek("-"):
+            self.take()
+            return ("neg", self.unary())
+        return self.primary()
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == "number":
+            return ("num", float(value))
+        if kind == "string":
+            return ("str", value)
+        if kind == "bracket":
+            return ("measure", value)
+        if kind == "table":
+            if self.peek() and self.peek()[0] == "bracket":
+                return ("col", value, self.take()[1])
+            return ("table", value)
+        if kind == "name":
+            if self.peek("("):
+                self.take("(")
+                args = []
+                while not self.peek(")"):
+                    args.append(self.expression())
+                    if not self.peek(")"):
+                        self.take(",")
+                self.take(")")
+                return ("call", value.upper(), tuple(args))
+            if self.peek() and self.peek()[0] == "bracket":
+                return ("col", value, self.take()[1])
+            if value.upper() in ("TRUE", "FALSE"):
+                return ("num", 1.0 if value.upper() == "TRUE" else 0.0)
+            return ("table", value)
+        if value == "(":
+            expression = self.expression()
+            self.take(")")
+            return expression
+        if value == "{":
+            items = []
+            while not self.peek("}"):
+                items.append(self.expression())
+                if not self.peek("}"):
+                    self.take(",")
+            self.take("}")
+            return ("list", tuple(items))
+        raise DaxError(f"Unexpected {value!r}")
+
+
+def parse(text):
+    return _Parser(text).parse()
+
+
+# Sub-expressions of a node (function arguments and list items are tuples of nodes)
+def _children(node):
+    for part in node[1:]:
+        if isinstance(part, tuple) and part and isinstance(part[0], str):
+            yield part
+        elif isinstance(part, tuple):
+            yield from part
+
+
+def _columns_of(node):
+    if node[0] == "col":
+        return (node[1:],)
+    return tuple(column for child in _children(node) for column in _columns_of(child))
+
+
+# The model column a DAX column resolves to; the product, subcategory and category lookups are one
+# denormalized product dimension here
+def _column_identity(table, column):
+    if table in lookup_tables:
+        return (lookup_tables[table][0], column)
+    return (table, column)
+
+
+# Step 2: Measure definitions. Parsed and checked once; DIVIDE's alternate text is kept as a display
+# format (like "No Sales"), the evaluated value stays a float
+class MeasureSet:
+    def __init__(self, definitions):
+        self.measures = {name: parse(text) for name, text in definitions.items()}
+        self.alternates = {}
+        for name, node in self.measures.items():
+            self._check(name, node, (name,))
+            if node[0] == "call" and node[1] == "DIVIDE" and len(node[2]) == 3 and node[2][2][0] == "str":
+                self.alternates[name] = node[2][2][1]
+        self.last_plan = None
+
+    def _check(self, name, node, path):
+        if node[0] == "call" and node[1] not in supported_functions:
+            raise DaxError(f"[{name}] uses {node[1]}, which is not in the supported DAX subset")
+        if node[0] == "measure":
+            if node[1] not in self.measures:
+                raise DaxError(f"[{name}] refers to unknown measure [{node[1]}]")
+            if node[1] in path:
+                raise DaxError(f"Measures refer to each other in a cycle: {' -> '.join(path + (node[1],))}")
+            self._check(node[1], self.measures[node[1]], path + (node[1],))
+        for child in _children(node):
+            self._check(name, child, path)
+
+    # Every requested measure is evaluated against one plan, so a subexpression used by several
+    # measures (a column, a RELATED lookup, a filter mask, [Quantity Sold]...) is computed once
+    def evaluate(self, model, names=None, by=None):
+        plan = MeasurePlan(model, self.measures, by)
+        names = list(self.measures) if names is None else list(names)
+        values = {name: plan.measure(name, ()) for name in names}
+        self.last_plan = plan
+        return pd.DataFrame(values, index=plan.group_labels)
+
+    def format(self, name, value, template="{:,.2f}"):
+        if pd.isna(value):
+            return self.alternates.get(name, "")
+        return template.format(value)
+
+
+def load_measures(path=MEASURES_PATH):
+    definitions = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("--") or line.startswith("//"):
+                continue
+            name, _, expression = line.partition("=")
+            if not expression:
+                raise DaxError(f"Expected 'Name = expression' in {path}: {line}")
+            definitions[name.strip().strip("[]")] = expression.strip()
+    return MeasureSet(definitions)
+
+
+# Step 3: Vectorized evaluation. Row expressions are numpy arrays over a fact table; aggregates are
+# bincounts over group codes, one value per group; every node is memoized by its tuple key.
+class MeasurePlan:
+    def __init__(self, model, measures, by=None):
+        self.model = model
+        self.measures = measures
+        self.computed = 0
+        self.reused = 0
+        self._memo = {}
+        self._group_codes(parse(by) if isinstance(by, str) else by)
+
+    def _cached(self, key, compute):
+        if key in self._memo:
+            self.reused += 1
+            return self._memo[key]
+        self.computed += 1
+        value = self._memo[key] = compute()
+        return value
+
+    def _frame(self, fact):
+        return getattr(self.model, fact_tables[fact])
+
+    def _group_codes(self, by):
+        self.codes = {}
+        self.group_column = None if by is None else _column_identity(by[1], by[2])
+        if by is None:
+            self.groups = 1
+            self.group_labels = pd.Index(["Total"])
+            for fact in fact_tables:
+                self.codes[fact] = np.zeros(len(self._frame(fact)), dtype=np.int64)
+            return
+        if by[0] != "col":
+            raise DaxError("Measures can only be grouped by a column")
+        labels = {fact: self.column(fact, by[1], by[2]) for fact in fact_tables}
+        known = [values for values in labels.values() if values is not None]
+        if not known:
+            raise DaxError(f"Cannot group by {by[1]}[{by[2]}]")
+        codes, uniques = pd.factorize(pd.concat([pd.Series(values) for values in known], ignore_index=True),
+                                      sort=True)
+        start = 0
+        for fact, values in labels.items():
+            if values is None:
+                # Not related to this fact table: its rows count in no group
+                self.codes[fact] = np.full(len(self._frame(fact)), -1, dtype=np.int64)
+                continue
+            self.codes[fact] = codes[start:start + len(values)].astype(np.int64)
+            start += len(values)
+        self.groups = len(uniques)
+        self.group_labels = pd.Index(uniques, name=by[2])
+
+    # Column values aligned to the rows of a fact table, or None when the table is not related to it
+    def column(self, fact, table, column):
+        return self._cached(("column", fact, table, column), lambda: self._column(fact, table, column))
+
+    def _column(self, fact, table, column):
+        frame = self._frame(fact)
+        if table == fact:
+            if column not in frame.columns:
+                raise DaxError(f"'{table}' has no column [{column}]")
+            return frame[column].to_numpy()
+        if table in fact_tables:
+            return None
+        if table == calendar_table:
+            dates = frame[fact_dates[fact]]
+            calendar = {
+                "Date": lambda: dates.dt.normalize(),
+                "Start of Month": lambda: frame["StartOfMonth"],
+                "Year": lambda: dates.dt.year,
+                "Month Number": lambda: dates.dt.month,
+            }
+            if column not in calendar:
+                raise DaxError(f"'{calendar_table}' has no column [{column}]")
+            return calendar[column]().to_numpy()
+        if table not in lookup_tables:
+            raise DaxError(f"Unknown table '{table}'")
+        if column in frame.columns and column != lookup_tables[table][1]:
+            # Already denormalized onto the fact table (names, categories, prices)
+            return frame[column].to_numpy()
+        dimension_name, key = lookup_tables[table]
+        dimension = getattr(self.model, dimension_name)
+        if column not in dimension.columns:
+            raise DaxError(f"'{table}' has no column [{column}]")
+        positions = self._cached(("positions", fact, dimension_name),
+                                 lambda: pd.Index(dimension[key]).get_indexer(frame[key]))
+        values = pd.Series(dimension[column].to_numpy()).reindex(positions).to_numpy()
+        return values
+
+    # Row context: a numeric array over the rows of `fact`, or a scalar
+    def row(self, fact, node):
+        if node[0] == "num":
+            return node[1]
+        return self._cached(("row", fact, node), lambda: self._row(fact, node))
+
+    def _row(self, fact, node):
+        kind = node[0]
+        if kind == "col":
+            values = self.column(fact, node[1], node[2])
+            if values is None:
+                raise DaxError(f"'{node[1]}'[{node[2]}] is not related to '{fact}'")
+            return pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype="float64")
+        if kind == "call" and node[1] == "RELATED":
+            return self.row(fact, node[2][0])
+        if kind == "neg":
+            return -self.row(fact, node[1])
+        if kind == "bin" and node[1] in "+-*/":
+            return _arithmetic(node[1], self.row(fact, node[2]), self.row(fact, node[3]))
+        if kind == "call" and node[1] == "DIVIDE":
+            return _divide(self.row(fact, node[2][0]), self.row(fact, node[2][1]), node[2][2:])
+        raise DaxError(f"Not supported in a row context: {node}")
+
+    # Filter context: a boolean mask over the rows of `fact`, or None when no filter applies to it
+    def mask(self, fact, filters):
+        if not filters:
+            return None
+        return self._cached(("mask", fact, filters), lambda: self._mask(fact, filters))
+
+    def _mask(self, fact, filters):
+        mask = None
+        for _, condition in filters:
+            predicate = self.predicate(fact, condition)
+            if predicate is not None:
+                mask = predicate if mask is None else mask & predicate
+        return mask
+
+    def predicate(self, fact, node):
+        return self._cached(("predicate", fact, node), lambda: self._predicate(fact, node))
+
+    def _predicate(self, fact, node):
+        if node[0] != "bin":
+            raise DaxError(f"Not a filter condition: {node}")
+        op, left, right = node[1:]
+        if op in ("&&", "||"):
+            a, b = self.predicate(fact, left), self.predicate(fact, right)
+            if a is None or b is None:
+                return a if b is None else b
+            return a & b if op == "&&" else a | b
+        if left[0] != "col":
+            left, right = right, left
+            op = {"<": ">", ">": "<", "<=": ">=", ">=": "<="}.get(op, op)
+        values = self.column(fact, left[1], left[2])
+        if values is None:
+            return None
+        values = pd.Series(values)
+        if op == "IN":
+            items = [_literal(item) for item in right[1]]
+            if all(isinstance(item, str) for item in items):
+                return values.astype("string").str.casefold().isin([item.casefold() for item in items]).to_numpy()
+            return values.isin(items).to_numpy()
+        literal = _literal(right)
+        if isinstance(literal, str):
+            # DAX compares text case-insensitively
+            values, literal = values.astype("string").str.casefold(), literal.casefold()
+        compare = {"=": values.eq, "<>": values.ne, "<": values.lt, "<=": values.le, ">": values.gt, ">=": values.ge}
+        return compare[op](literal).fillna(False).to_numpy(dtype=bool)
+
+    # Aggregates: one value per group
+    def measure(self, name, filters):
+        return self._cached(("measure", name, filters), lambda: self.aggregate(self.measures[name], filters))
+
+    def aggregate(self, node, filters):
+        return self._cached(("aggregate", node, filters), lambda: self._aggregate(node, filters))
+
+    def _aggregate(self, node, filters):
+        kind = node[0]
+        if kind == "num":
+            return np.full(self.groups, node[1])
+        if kind == "measure":
+            return self.measure(node[1], filters)
+        if kind == "neg":
+            return -self.aggregate(node[1], filters)
+        if kind == "bin" and node[1] in "+-*/":
+            return _arithmetic(node[1], self.aggregate(node[2], filters), self.aggregate(node[3], filters))
+        if kind != "call":
+            raise DaxError(f"Not an aggregate: {node}")
+
+        function, args = node[1], node[2]
+        if function == "SUMX":
+            return self._sum(_fact_of(args[0]), args[1], filters)
+        if function == "SUM":
+            return self._sum(_fact_of(args[0]), args[0], filters)
+        if function == "COUNTROWS":
+            codes, _, groups = self._selected(_fact_of(args[0]), filters)
+            return self._per_group(np.bincount(codes, minlength=groups).astype("float64"), groups)
+        if function == "DISTINCTCOUNT":
+            return self._distinct_count(_fact_of(args[0]), args[0], filters)
+        if function == "DIVIDE":
+            return _divide(self.aggregate(args[0], filters), self.aggregate(args[1], filters), args[2:])
+        if function == "CALCULATE":
+            return self.aggregate(args[0], _with_filters(filters, args[1:]))
+        raise DaxError(f"Unsupported function {function}")
+
+    # A CALCULATE filter on the grouping column replaces the group's own filter on that column, as in DAX:
+    # every group then sees the same rows, so the value is computed once and repeated for each group
+    def _grouping(self, fact, filters):
+        if self.group_column is not None and any(self.group_column in columns for columns, _ in filters):
+            return np.zeros(len(self.codes[fact]), dtype=np.int64), 1
+        return self.codes[fact], self.groups
+
+    def _per_group(self, totals, groups):
+        return totals if groups == self.groups else np.repeat(totals, self.groups)
+
+    def _selected(self, fact, filters, values=None):
+        codes, groups = self._grouping(fact, filters)
+        keep = codes >= 0
+        mask = self.mask(fact, filters)
+        if mask is not None:
+            keep &= mask
+        return codes[keep], None if values is None else values[keep], groups
+
+    def _sum(self, fact, expression, filters):
+        values = self.row(fact, expression)
+        if np.isscalar(values):
+            values = np.full(len(self.codes[fact]), values, dtype="float64")
+        codes, values, groups = self._selected(fact, filters, np.nan_to_num(values))
+        return self._per_group(np.bincount(codes, weights=values, minlength=groups), groups)
+
+    def _distinct_count(self, fact, column, filters):
+        value_codes = self._cached(("factorize", fact, column),
+                                   lambda: pd.factorize(pd.Series(self.column(fact, column[1], column[2])))[0])
+        codes, value_codes, groups = self._selected(fact, filters, value_codes)
+        present = value_codes >= 0
+        width = max(int(value_codes.max()) + 1, 1) if len(value_codes) else 1
+        pairs = np.unique(codes[present] * width + value_codes[present])
+        return self._per_group(np.bincount(pairs // width, minlength=groups).astype("float64"), groups)
+
+
+def _fact_of(node):
+    table = node[1]
+    if node[0] not in ("table", "col") or table not in fact_tables:
+        raise DaxError(f"Aggregations run over a fact table ({', '.join(fact_tables)}), not {table!r}")
+    return table
+
+
+def _literal(node):
+    if node[0] in ("num", "str"):
+        return node[1]
+    if node[0] == "neg":
+        return -_literal(node[1])
+    if node[0] == "call" and node[1] == "DATE":
+        year, month, day = (int(_literal(arg)) for arg in node[2])
+        return pd.Timestamp(year=year, month=month, day=day)
+    raise DaxError(f"Filters compare a column with a constant, not {node}")
+
+
+# CALCULATE replaces an existing filter on the same column(s) and keeps the others
+def _with_filters(filters, conditions):
+    merged = dict(filters)
+    for condition in conditions:
+        merged[tuple(sorted({_column_identity(*column) for column in _columns_of(condition)}))] = condition
+    return tuple(sorted(merged.items(), key=repr))
+
+
+def _arithmetic(op, left, right):
+    if op == "+":
+        return np.nan_to_num(left) + np.nan_to_num(right)
+    if op == "-":
+        return np.nan_to_num(left) - np.nan_to_num(right)
+    if op == "*":
+        return left * right
+    return _divide(left, right, ())
+
+
+# DIVIDE(a, b[, alternate]): blank (NaN) where b is 0 or blank, or the alternate when it is a number
+def _divide(numerator, denominator, alternate):
+    numerator, denominator = np.asarray(numerator, dtype="float64"), np.asarray(denominator, dtype="float64")
+    valid = (denominator != 0) & ~np.isnan(denominator)
+    result = np.divide(numerator, np.where(valid, denominator, 1.0))
+    fallback = alternate[0][1] if alternate and alternate[0][0] == "num" else np.nan
+    return np.where(valid, result, fallback)
+
+
+# Step 4: The report measures, evaluated together over the shared model
+@instrument("evaluate dax measures", rows=len)
+def evaluate_measures(model, measures, names=None, by=None):
+    return measures.evaluate(model, names=names, by=by)
@@ -0,0 +1,29 @@
+from taipy.gui import Markdown
+
+from instrumentation import recent_timings, slowest_stages
+
+# Diagnostics page: add it next to a dashboard with
+#     Gui(pages={"/": "<|navbar|>", "dashboard": layout, "diagnostics": diagnostics_page})
+# Its variables live in this module, so they do not clash with the dashboard's own.
+stage_timings = recent_timings()
+stage_summary = slowest_stages()
+
+
+def on_diagnostics_refresh(state):
+    state.stage_timings = recent_timings()
+    state.stage_summary = slowest_stages()
+
+
+diagnostics_page = Markdown("""
+# Diagnostics
+
+## Slowest Stages
+<|{stage_summary}|table|page_size=10|number_format=%.4f|>
+
+<|{stage_summary}|chart|type=bar|x=stage|y=total_seconds|title=Total Seconds by Stage|>
+
+## Recent Stage Timings
+<|{stage_timings}|table|page_size=20|number_format=%.4f|>
+
+<|Refresh|button|on_action=on_diagnostics_refresh|>
+""")
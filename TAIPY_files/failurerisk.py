@@ -0,0 +1,170 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataloader import CACHE_DIR, sensor_files, write_atomic
+
+# Serialized model; retrained only when the labelled readings change
+MODEL_PATH = os.path.join(CACHE_DIR, "failure_risk.npz")
+TRAINING_SOURCE = "predictive_maintenance"
+
+# The alert threshold is calibrated on the training labels so that this share of the readings that
+# failed is flagged; ARCHIOT_FAILURE_THRESHOLD sets a fixed probability threshold instead
+TARGET_RECALL = float(os.environ.get("ARCHIOT_FAILURE_RECALL", "0.8"))
+THRESHOLD_OVERRIDE = os.environ.get("ARCHIOT_FAILURE_THRESHOLD")
+
+feature_columns = [
+    "Air temperature [K]",
+    "Process temperature [K]",
+    "Rotational speed [rpm]",
+    "Torque [Nm]",
+    "Tool wear [min]",
+]
+no_failure = "No Failure"
+
+# Raw readings plus derived features; their pairwise products give the linear model the
+# interactions the failure modes depend on (e.g. low temperature delta at low speed)
+continuous_names = feature_columns + ["Power [W]", "Temperature delta [K]", "Strain [min Nm]"]
+_pair_i, _pair_j = np.triu_indices(len(continuous_names))
+feature_names = (
+    continuous_names
+    + [f"{continuous_names[i]} x {continuous_names[j]}" for i, j in zip(_pair_i, _pair_j)]
+    + ["Type M", "Type H"]
+)
+
+
+# Step 1: Feature matrix for a whole batch, written into one preallocated float64 array
+def build_features(readings):
+    n = len(readings)
+    width = len(continuous_names)
+    features = np.empty((n, len(feature_names)))
+    for j, column in enumerate(feature_columns):
+        features[:, j] = readings[column]
+    air, process, rpm, torque, wear = (features[:, j] for j in range(5))
+    power = features[:, 5]
+    np.multiply(torque, rpm * (2 * np.pi / 60), out=power)
+    np.subtract(process, air, out=features[:, 6])
+    np.multiply(wear, torque, out=features[:, 7])
+    continuous = features[:, :width]
+    np.multiply(continuous[:, _pair_i], continuous[:, _pair_j], out=features[:, width:width + len(_pair_i)])
+    machine_type = np.asarray(readings["Type"])
+    features[:, -2] = machine_type == "M"
+    features[:, -1] = machine_type == "H"
+    return features
+
+
+def _sigmoid(z):
+    return 0.5 * (1 + np.tanh(0.5 * z))
+
+
+# Highest probability threshold that still flags at least `recall` of the rows with Target = 1
+def calibrate_threshold(probability, target, recall=TARGET_RECALL):
+    positives = np.sort(probability[np.asarray(target) == 1])
+    if len(positives) == 0:
+        return 0.5
+    return float(positives[int(np.floor((1 - recall) * len(positives)))])
+
+
+def _softmax(z):
+    z = z - z.max(axis=1, keepdims=True)
+    np.exp(z, out=z)
+    return z / z.sum(axis=1, keepdims=True)
+
+
+# Step 2: Logistic regression for Target (Newton's method) and a softmax over the failure types
+class FailureRiskModel:
+    def __init__(self, mean, scale, coef, type_coef, failure_types, threshold=0.5):
+        self.mean = mean
+        self.scale = scale
+        self.coef = coef
+        self.type_coef = type_coef
+        self.failure_types = np.asarray(failure_types)
+        self.threshold = threshold
+        # Standardization folded into the weights, so scoring is a single matrix product per head
+        self._weights = np.column_stack([coef[1:], type_coef[:, 1:].T]) / scale[:, None]
+        self._bias = np.concatenate([[coef[0]], type_coef[:, 0]]) - mean @ self._weights
+
+    @classmethod
+    def train(cls, readings, l2=1e-2, iterations=50, type_iterations=2000, learning_rate=0.5,
+              recall=TARGET_RECALL):
+        features = build_features(readings)
+        mean = features.mean(axis=0)
+        scale = features.std(axis=0)
+        scale[scale == 0] = 1
+        x = np.column_stack([np.ones(len(features)), (features - mean) / scale])
+        penalty = np.full(x.shape[1], l2)
+        penalty[0] = 0
+
+        target = np.asarray(readings["Target"], dtype=np.float64)
+        coef = np.zeros(x.shape[1])
+        for _ in range(iterations):
+            p = _sigmoid(x @ coef)
+            gradient = x.T @ (p - target) + penalty * coef
+            hessian = (x * (p * (1 - p))[:, None]).T @ x + np.diag(penalty)
+            step = np.linalg.solve(hessian, gradient)
+            coef -= step
+            if np.abs(step).max() < 1e-8:
+                break
+        threshold = calibrate_threshold(_sigmoid(x @ coef), target, recall)
+
+        # The failure type is only learnt from readings that actually failed
+        failure_type = np.asarray(readings["Failure Type"])
+        failed = failure_type != no_failure
+        failure_types, labels = np.unique(failure_type[failed], return_inverse=True)
+        x_failed = x[failed]
+        onehot = np.eye(len(failure_types))[labels]
+        type_coef = np.zeros((len(failure_types), x.shape[1]))
+        for _ in range(type_iterations):
+            p = _softmax(x_failed @ type_coef.T)
+            gradient = (p - onehot).T @ x_failed / len(x_failed) + penalty * type_coef / len(x_failed)
+            type_coef -= learning_rate * gradient
+        return cls(mean, scale, coef, type_coef, failure_types, threshold)
+
+    # Returns (failure probability, predicted failure type) for every row of the batch
+    def predict(self, readings):
+        scores = build_features(readings) @ self._weights
+        scores += self._bias
+        probability = _sigmoid(scores[:, 0])
+        predicted = self.failure_types[scores[:, 1:].argmax(axis=1)].astype(object)
+        predicted[probability < self.threshold] = no_failure
+        return probability, predicted
+
+    def score(self, readings):
+        probability, predicted = self.predict(readings)
+        return pd.DataFrame({"Failure Probability": probability, "Predicted Failure Type": predicted},
+                            index=getattr(readings, "index", None))
+
+    def save(self, path=MODEL_PATH, signature=()):
+        def write(tmp_path):
+            with open(tmp_path, "wb") as f:
+                np.savez(f, mean=self.mean, scale=self.scale, coef=self.coef, type_coef=self.type_coef,
+                         failure_types=self.failure_types.astype(str), threshold=self.threshold,
+                         signature=np.array([str(signature)]))
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, write)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        with np.load(path) as saved:
+            model = cls(saved["mean"], saved["scale"], saved["coef"], saved["type_coef"], saved["failure_types"],
+                        float(saved["threshold"]))
+            model.signature = str(saved["signature"][0])
+        return model
+
+
+# Step 3: Load the serialized model, training it first if it is missing or the labels changed
+def load_failure_model(path=MODEL_PATH):
+    source_path = sensor_files[TRAINING_SOURCE]
+    stat = os.stat(source_path)
+    signature = (TRAINING_SOURCE, stat.st_mtime_ns, stat.st_size, TARGET_RECALL)
+    model = FailureRiskModel.load(path) if os.path.exists(path) else None
+    if model is None or model.signature != str(signature):
+        readings = pd.read_csv(source_path, encoding="utf-8-sig")
+        model = FailureRiskModel.train(readings)
+        model.save(path, signature)
+        model.signature = str(signature)
+    if THRESHOLD_OVERRIDE:
+        model.threshold = float(THRESHOLD_OVERRIDE)
+    return model
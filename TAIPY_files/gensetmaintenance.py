@@ -0,0 +1,120 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataloader import CACHE_DIR, feather, load_table, read_json, write_atomic, write_json
+
+# Nominal service every N running minutes (the readings carry no service records, so the schedule is
+# counted from a zero meter); a genset is due when its next service is this many readings away
+SERVICE_INTERVAL_MINUTES = float(os.environ.get("ARCHIOT_SERVICE_INTERVAL_MINUTES", "100"))
+DUE_WITHIN_READINGS = float(os.environ.get("ARCHIOT_DUE_WITHIN_READINGS", "30"))
+
+STATE_PATH = os.path.join(CACHE_DIR, "genset_state.arrow")
+STATE_MANIFEST = os.path.join(CACHE_DIR, "genset_state.json")
+SOURCE = "diesel_generators"
+
+# Latest sensor values carried in the state next to the running-minutes counters
+sensor_columns = ["Load Percentage (%)", "Oil Pressure (psi)", "Coolant Temp (C)", "Battery Voltage (V)"]
+
+# Rate Minutes / Rate Readings are the running sums behind Minutes Per Reading, so folding the readings
+# in blocks gives the same state as processing them all at once
+state_columns = ["Readings", "Meter Minutes", "Running Minutes", "Rate Minutes", "Rate Readings",
+                 "Minutes Per Reading"] + sensor_columns
+
+
+def empty_state():
+    state = pd.DataFrame({column: pd.Series(dtype="float64") for column in state_columns})
+    state.index.name = "Asset ID"
+    return state
+
+
+# Step 1: Fold a block of new readings into the per-generator state.
+# Running Minutes is a meter; a drop means the meter was reset, and the new value counts as run time.
+def update_state(state, readings):
+    if readings.empty:
+        return state
+    assets = readings["Asset ID"]
+    meter = readings["Running Minutes"].astype("float64")
+    previous = meter.groupby(assets).shift()
+    # First reading of a genset in this block continues from the meter value stored in the state
+    previous = previous.fillna(assets.map(state["Meter Minutes"]))
+    increment = meter - previous
+    increment = increment.where(increment >= 0, meter)
+    # The very first reading of a genset only sets the baseline for its rate
+    rate_increment = increment.where(previous.notna())
+
+    grouped = pd.DataFrame({"Asset ID": assets, "increment": increment, "rate": rate_increment})
+    grouped = grouped.groupby("Asset ID", sort=False)
+    block = grouped["increment"].agg(["sum", "count"])
+    block_rate = grouped["rate"].agg(["sum", "count"])
+    latest = readings.groupby("Asset ID", sort=False).last()
+
+    state = state.reindex(state.index.union(block.index))
+    state.index.name = "Asset ID"
+    counts = block["count"].reindex(state.index)
+    touched = counts.notna()
+
+    # Average minutes per reading over every reading after the first, from the running sums
+    for column, values in (("Rate Minutes", block_rate["sum"]), ("Rate Readings", block_rate["count"])):
+        state.loc[touched, column] = state.loc[touched, column].fillna(0) + values
+    state["Minutes Per Reading"] = state["Rate Minutes"] / state["Rate Readings"].where(state["Rate Readings"] > 0)
+    state.loc[touched, "Running Minutes"] = state.loc[touched, "Running Minutes"].fillna(0) + block["sum"]
+    state.loc[touched, "Readings"] = state.loc[touched, "Readings"].fillna(0) + counts[touched]
+    state.loc[touched, "Meter Minutes"] = latest["Running Minutes"].astype("float64")
+    state.loc[touched, sensor_columns] = latest[sensor_columns].astype("float64")
+    return state
+
+
+# Step 2: Nominal service schedule derived from the state; nothing here touches the raw readings.
+# The scheduled points are multiples of the interval on the running-minutes meter, not logged services.
+def maintenance_schedule(state, interval=SERVICE_INTERVAL_MINUTES, due_within=DUE_WITHIN_READINGS):
+    schedule = state.copy()
+    schedule["Last Scheduled Service"] = np.floor(schedule["Running Minutes"] / interval) * interval
+    schedule["Next Scheduled Service"] = schedule["Last Scheduled Service"] + interval
+    schedule["Minutes To Service"] = schedule["Next Scheduled Service"] - schedule["Running Minutes"]
+    rate = schedule["Minutes Per Reading"].where(schedule["Minutes Per Reading"] > 0)
+    schedule["Readings To Service"] = (schedule["Minutes To Service"] / rate).round(1)
+    schedule["Due"] = schedule["Readings To Service"] <= due_within
+    return schedule.sort_values("Readings To Service", na_position="last").reset_index()
+
+
+# Step 3: Persisted state; only readings past the last processed row are folded in.
+# The spreadsheet itself is read through the columnar cache, so it is parsed once per change.
+class GensetStateStore:
+    def __init__(self, path=STATE_PATH, manifest_path=STATE_MANIFEST):
+        self.path = path
+        self.manifest_path = manifest_path
+        self.state = empty_state()
+        self.rows = 0
+        manifest = read_json(manifest_path)
+        if manifest is not None and feather is not None and os.path.exists(path):
+            state = feather.read_feather(path).set_index("Asset ID")
+            # A state saved with other columns is rebuilt from the readings
+            if list(state.columns) == state_columns:
+                self.state = state
+                self.rows = manifest["rows"]
+
+    def sync(self):
+        readings = load_table(SOURCE)
+        if len(readings) < self.rows:
+            # The sheet was rewritten rather than appended to: rebuild from the start
+            self.state = empty_state()
+            self.rows = 0
+        if len(readings) == self.rows:
+            return False
+        self.state = update_state(self.state, readings.iloc[self.rows:])
+        self.rows = len(readings)
+        self.save()
+        return True
+
+    def save(self):
+        if feather is None:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        frame = self.state.reset_index()
+        write_atomic(self.path, lambda tmp_path: feather.write_feather(frame, tmp_path, compression="uncompressed"))
+        write_json(self.manifest_path, {"rows": self.rows})
+
+    def schedule(self):
+        return maintenance_schedule(self.state)
@@ -0,0 +1,99 @@
+import functools
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+# How many stage timings are kept in memory; ARCHIOT_TRACE_MEMORY=1 switches on tracemalloc
+# (Python-level allocations, slower); otherwise memory deltas use the process RSS where available
+INSTRUMENT_HISTORY = int(os.environ.get("ARCHIOT_INSTRUMENT_HISTORY", "500"))
+if os.environ.get("ARCHIOT_TRACE_MEMORY") == "1" and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+_records = deque(maxlen=INSTRUMENT_HISTORY)
+_lock = threading.Lock()
+_page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _memory_bytes():
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _page_size
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _row_count(result):
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return len(result)
+    return None
+
+
+# Step 1: Record one stage. The yielded dict can be given a row count inside the block:
+#     with timed("load sales") as record:
+#         ...
+#         record["rows"] = len(sales)
+@contextmanager
+def timed(stage, rows=None):
+    record = {"stage": stage, "rows": rows, "thread": threading.current_thread().name}
+    memory_before = _memory_bytes()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        memory_after = _memory_bytes()
+        record["memory_delta"] = None if memory_before is None or memory_after is None else memory_after - memory_before
+        record["finished"] = pd.Timestamp.now()
+        with _lock:
+            _records.append(record)
+
+
+# Decorator form; rows are taken from a returned DataFrame/Series, or from rows(result) when given
+def instrument(stage=None, rows=None):
+    def decorate(function):
+        name = stage or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timed(name) as record:
+                result = function(*args, **kwargs)
+                record["rows"] = rows(result) if rows is not None else _row_count(result)
+            return result
+        return wrapper
+    return decorate
+
+
+# Step 2: Views over the recorded stages
+def recent_timings(limit=50):
+    with _lock:
+        records = list(_records)[-limit:]
+    columns = ["finished", "stage", "seconds", "rows", "memory_delta", "thread"]
+    frame = pd.DataFrame(records, columns=columns).iloc[::-1].reset_index(drop=True)
+    frame["memory_delta_mb"] = frame.pop("memory_delta") / 2**20
+    return frame
+
+
+def slowest_stages(limit=10):
+    timings = recent_timings(limit=INSTRUMENT_HISTORY)
+    if timings.empty:
+        return pd.DataFrame(columns=["stage", "calls", "total_seconds", "mean_seconds", "max_seconds", "rows"])
+    summary = timings.groupby("stage").agg(
+        calls=("seconds", "size"),
+        total_seconds=("seconds", "sum"),
+        mean_seconds=("seconds", "mean"),
+        max_seconds=("seconds", "max"),
+        rows=("rows", "max"),
+    )
+    return summary.nlargest(limit, "total_seconds").reset_index()
+
+
+def clear_timings():
+    with _lock:
+        _records.clear()
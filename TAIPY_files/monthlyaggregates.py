@@ -0,0 +1,157 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataloader import CACHE_DIR, csv_files, feather, load_table, read_json, sales_files, write_atomic, write_json
+from instrumentation import instrument
+from starschema import build_returns_fact, build_sales_fact, load_dimensions
+
+# Persisted monthly aggregates: one row per month plus the distinct order numbers seen in each month
+STORE_DIR = os.path.join(CACHE_DIR, "monthly")
+
+measure_columns = ["Total_Revenue", "Total_Cost", "Total_Quantity", "Total_Orders", "Total_Returns"]
+
+# Changing any lookup changes RELATED(ProductPrice/ProductCost), so the store is rebuilt from scratch
+dimension_sources = ["product_lookup", "product_subcategories", "product_categories", "territory"]
+
+
+def _month_of(dates):
+    return dates.dt.to_period("M").dt.start_time
+
+
+def _signature(name):
+    stat = os.stat(csv_files[name])
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+class MonthlyAggregateStore:
+    def __init__(self, monthly=None, month_orders=None, sources=None):
+        if monthly is None:
+            monthly = pd.DataFrame(columns=measure_columns, dtype="float64", index=pd.DatetimeIndex([], name="Month"))
+        self.monthly = monthly
+        # Month -> sorted unique OrderNumbers, so a new day only re-counts the months it touches
+        self.month_orders = month_orders if month_orders is not None else {}
+        # Source name -> {"mtime_ns", "size", "rows"} for every file folded into the store
+        self.sources = sources if sources is not None else {}
+
+    def _add_deltas(self, deltas):
+        months = self.monthly.index.union(deltas.index)
+        self.monthly = self.monthly.reindex(months, fill_value=0.0)
+        self.monthly.index.name = "Month"
+        self.monthly.loc[deltas.index, deltas.columns] += deltas
+
+    # Step 1: Fold new sales rows (with Revenue/Cost at row grain) into the months they fall in
+    def add_sales(self, sales):
+        sales = sales[sales["OrderDate"].notna()]
+        if sales.empty:
+            return []
+        months = _month_of(sales["OrderDate"])
+        grouped = sales.groupby(months)
+        deltas = grouped[["Revenue", "Cost", "OrderQuantity"]].sum()
+        deltas.columns = ["Total_Revenue", "Total_Cost", "Total_Quantity"]
+        self._add_deltas(deltas.astype("float64"))
+
+        order_numbers = sales["OrderNumber"].to_numpy()
+        for month, positions in grouped.indices.items():
+            new_orders = np.unique(order_numbers[positions])
+            seen = self.month_orders.get(month)
+            orders = new_orders if seen is None else np.union1d(seen, new_orders)
+            self.month_orders[month] = orders
+            self.monthly.loc[month, "Total_Orders"] = len(orders)
+        return list(deltas.index)
+
+    def add_returns(self, returns):
+        returns = returns[returns["ReturnDate"].notna()]
+        if returns.empty:
+            return []
+        deltas = returns.groupby(_month_of(returns["ReturnDate"]))[["ReturnQuantity"]].sum()
+        deltas.columns = ["Total_Returns"]
+        self._add_deltas(deltas.astype("float64"))
+        return list(deltas.index)
+
+    # Step 2: Pick up rows appended to the source files since the last sync.
+    # Returns the touched months, or None when a file was rewritten and the store must be rebuilt.
+    def sync_sources(self):
+        for name in dimension_sources:
+            if self.sources.get(name) not in (None, _signature(name)):
+                return None
+
+        pending = [name for name in sales_files + ["returns"] if not self._is_current(name)]
+        if not pending:
+            return []
+
+        products, territories = load_dimensions()
+        touched = set()
+        for name in pending:
+            table = load_table(name)
+            seen_rows = self.sources.get(name, {}).get("rows", 0)
+            if len(table) < seen_rows:
+                return None
+            new_rows = table.iloc[seen_rows:]
+            if name == "returns":
+                touched.update(self.add_returns(build_returns_fact(new_rows, products, territories)))
+            else:
+                touched.update(self.add_sales(build_sales_fact(new_rows, products, territories)))
+            self.sources[name] = dict(_signature(name), rows=len(table))
+
+        for name in dimension_sources:
+            self.sources[name] = _signature(name)
+        return sorted(touched)
+
+    def _is_current(self, name):
+        seen = self.sources.get(name)
+        return seen is not None and {"mtime_ns": seen["mtime_ns"], "size": seen["size"]} == _signature(name)
+
+    # Step 3: Monthly series with previous-month values for the KPI cards
+    def monthly_frame(self):
+        if self.monthly.empty:
+            return pd.DataFrame(columns=["Month"] + measure_columns)
+        months = pd.date_range(self.monthly.index.min(), self.monthly.index.max(), freq="MS", name="Month")
+        frame = self.monthly.reindex(months, fill_value=0.0)
+        frame["Prev_Revenue"] = frame["Total_Revenue"].shift(1)
+        frame["Prev_Orders"] = frame["Total_Orders"].shift(1)
+        frame["Prev_Returns"] = frame["Total_Returns"].shift(1)
+        return frame.reset_index()
+
+    def save(self, directory=STORE_DIR):
+        if feather is None:
+            return
+        os.makedirs(directory, exist_ok=True)
+        monthly = self.monthly.reset_index()
+        months = list(self.month_orders)
+        orders = pd.DataFrame({
+            "Month": np.repeat(np.array(months, dtype="datetime64[ns]"), [len(self.month_orders[m]) for m in months]),
+            "OrderNumber": np.concatenate([self.month_orders[m] for m in months]) if months else [],
+        })
+        write_atomic(os.path.join(directory, "monthly.arrow"), lambda tmp_path: monthly.to_feather(tmp_path))
+        write_atomic(os.path.join(directory, "orders.arrow"), lambda tmp_path: orders.to_feather(tmp_path))
+        # Written last: a store without a manifest is treated as missing and rebuilt
+        write_json(os.path.join(directory, "sources.json"), self.sources)
+
+    @classmethod
+    def load(cls, directory=STORE_DIR):
+        sources = read_json(os.path.join(directory, "sources.json"))
+        if feather is None or sources is None:
+            return cls()
+        monthly = pd.read_feather(os.path.join(directory, "monthly.arrow")).set_index("Month")
+        orders = pd.read_feather(os.path.join(directory, "orders.arrow"))
+        month_orders = {
+            month: orders["OrderNumber"].to_numpy()[positions]
+            for month, positions in orders.groupby("Month").indices.items()
+        }
+        return cls(monthly, month_orders, sources)
+
+
+# Load the persisted store (or sync an already loaded one) and fold in whatever arrived since it was written
+@instrument("aggregate monthly store", rows=lambda store: len(store.monthly))
+def load_monthly_store(directory=STORE_DIR, store=None):
+    if store is None:
+        store = MonthlyAggregateStore.load(directory)
+    touched = store.sync_sources()
+    if touched is None:
+        store = MonthlyAggregateStore()
+        touched = store.sync_sources()
+    if touched:
+        store.save(directory)
+    return store
@@ -0,0 +1,151 @@
+import os
+import threading
+
+import pandas as pd
+
+from dataloader import (CACHE_DIR, concat_arrow_tables, feather, load_table, pa, read_json, sales_files, source_path,
+                        table_schemas, write_atomic, write_json)
+from instrumentation import timed
+
+# Sales and Returns split by the month of their date column: one Arrow file per (source file, month)
+# plus a manifest per source with the row count and min/max date of every partition
+PARTITION_DIR = os.path.join(CACHE_DIR, "partitions")
+
+
+def _signature(name):
+    stat = os.stat(source_path(name))
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _write_arrow(path, frame):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    write_atomic(path, lambda tmp_path: feather.write_feather(table, tmp_path, compression="uncompressed"))
+
+
+class MonthPartitions:
+    def __init__(self, names, date_column, directory=PARTITION_DIR):
+        self.names = list(names)
+        self.date_column = date_column
+        self.directory = directory
+        self.last_scan = None
+        self._manifests = {}
+        self._lock = threading.Lock()
+
+    def _manifest_path(self, name):
+        return os.path.join(self.directory, f"{name}.json")
+
+    # Step 1: Split one source file into monthly partitions. Only the source that changed is rewritten;
+    # rows without a date go to an "undated" partition that no date range selects.
+    def _write_partitions(self, name, signature):
+        table = load_table(name)
+        folder = os.path.join(self.directory, name)
+        os.makedirs(folder, exist_ok=True)
+
+        dates = table[self.date_column]
+        groups = table.groupby(dates.dt.to_period("M").astype("string").fillna("undated")).indices
+        partitions = []
+        for month, positions in sorted(groups.items()):
+            part = table.iloc[positions]
+            _write_arrow(os.path.join(folder, f"{month}.arrow"), part)
+            part_dates = part[self.date_column]
+            partitions.append({
+                "month": month,
+                "file": f"{month}.arrow",
+                "rows": len(part),
+                "min": None if month == "undated" else part_dates.min().isoformat(),
+                "max": None if month == "undated" else part_dates.max().isoformat(),
+            })
+
+        manifest = {
+            "source": signature,
+            "date_column": self.date_column,
+            "schema": table_schemas.get(name),
+            "partitions": partitions,
+        }
+        write_json(self._manifest_path(name), manifest)
+        # Months that no longer occur in the source
+        current = {partition["file"] for partition in partitions}
+        for file in os.listdir(folder):
+            if file.endswith(".arrow") and file not in current:
+                os.remove(os.path.join(folder, file))
+        return manifest
+
+    def sync(self):
+        with self._lock:
+            for name in self.names:
+                signature = _signature(name)
+                manifest = self._manifests.get(name) or read_json(self._manifest_path(name))
+                if (manifest is None or manifest["source"] != signature
+                        or manifest.get("date_column") != self.date_column
+                        or manifest.get("schema") != table_schemas.get(name)):
+                    manifest = self._write_partitions(name, signature)
+                self._manifests[name] = manifest
+            return [
+                dict(partition, path=os.path.join(self.directory, name, partition["file"]))
+                for name in self.names
+                for partition in self._manifests[name]["partitions"]
+            ]
+
+    # Step 2: Keep only the partitions whose [min, max] overlaps [start, end)
+    def prune(self, partitions, start=None, end=None):
+        if start is None and end is None:
+            return partitions
+        selected = []
+        for partition in partitions:
+            if partition["min"] is None:
+                continue
+            if start is not None and pd.Timestamp(partition["max"]) < start:
+                continue
+            if end is not None and pd.Timestamp(partition["min"]) >= end:
+                continue
+            selected.append(partition)
+        return selected
+
+    # Rows with start <= date < end, reading only the partitions that can contain them
+    def scan(self, start=None, end=None, columns=None):
+        if feather is None:
+            frame = pd.concat([load_table(name) for name in self.names], ignore_index=True)
+            return self._filter(frame, start, end)[columns or frame.columns]
+
+        with timed(f"scan {self.date_column} partitions") as record:
+            partitions = self.sync()
+            selected = self.prune(partitions, start, end)
+            self.last_scan = {"read": len(selected), "skipped": len(partitions) - len(selected)}
+            if columns is not None and self.date_column not in columns:
+                read_columns = [self.date_column] + list(columns)
+            else:
+                read_columns = columns
+
+            if selected:
+                tables = [feather.read_table(p["path"], columns=read_columns, memory_map=True) for p in selected]
+            elif partitions:
+                tables = [feather.read_table(partitions[0]["path"], columns=read_columns, memory_map=True).slice(0, 0)]
+            else:
+                return pd.DataFrame(columns=columns or [self.date_column])
+            frame = self._filter(concat_arrow_tables(tables).to_pandas(split_blocks=True), start, end)
+            record["rows"] = len(frame)
+        return frame[columns] if columns is not None else frame
+
+    def _filter(self, frame, start, end):
+        mask = pd.Series(True, index=frame.index)
+        if start is not None:
+            mask &= frame[self.date_column] >= start
+        if end is not None:
+            mask &= frame[self.date_column] < end
+        return frame[mask].reset_index(drop=True)
+
+    # First day of the latest month with data, from the partition statistics alone
+    def latest_month(self):
+        if feather is None:
+            maxima = [load_table(name)[self.date_column].max() for name in self.names]
+            maxima = [value.isoformat() for value in maxima if pd.notna(value)]
+        else:
+            maxima = [partition["max"] for partition in self.sync() if partition["max"] is not None]
+        if not maxima:
+            return None
+        return pd.Timestamp(max(maxima)).to_period("M").start_time
+
+
+# Step 3: The partitioned fact sources used by the dashboards
+sales_partitions = MonthPartitions(sales_files, "OrderDate")
+returns_partitions = MonthPartitions(["returns"], "ReturnDate")
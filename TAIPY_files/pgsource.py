@@ -0,0 +1,175 @@
+import asyncio
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# psycopg2 is only needed for a real PostgreSQL server; SQLite works as a local stand-in
+try:
+    import psycopg2
+    from psycopg2 import pool as pg_pool
+except ImportError:
+    psycopg2 = None
+    pg_pool = None
+
+# Database connection settings, overridable from the environment
+db_config = {
+    "dbname": os.environ.get("ARCHIOT_DB_NAME", "new_db"),
+    "user": os.environ.get("ARCHIOT_DB_USER", "postgres"),
+    "password": os.environ.get("ARCHIOT_DB_PASSWORD", ""),
+    "host": os.environ.get("ARCHIOT_DB_HOST", "localhost"),
+    "port": os.environ.get("ARCHIOT_DB_PORT", "5432"),
+}
+
+# Seconds a query result is reused before the database is asked again
+QUERY_TTL = float(os.environ.get("ARCHIOT_QUERY_TTL", "60"))
+
+_placeholder = re.compile(r"\$(\d+)")
+
+
+# Same getconn/putconn interface as psycopg2's pools, for SQLite connections
+class SQLitePool:
+    def __init__(self, database, maxconn=5):
+        self.database = database
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(maxconn)
+
+    def getconn(self):
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return sqlite3.connect(self.database, check_same_thread=False)
+
+    def putconn(self, conn):
+        self._idle.put(conn)
+        self._slots.release()
+
+    def closeall(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+# Pooled query source: named statements are prepared once per connection, results are cached
+# with a TTL, and queries can run on a worker thread so the GUI event loop never waits on them
+class QuerySource:
+    def __init__(self, pool=None, dialect="postgres", ttl=QUERY_TTL, workers=4):
+        if pool is None:
+            if pg_pool is None:
+                raise ImportError("psycopg2 is required for a PostgreSQL source; use sqlite_source() instead")
+            pool = pg_pool.ThreadedConnectionPool(1, workers + 1, **db_config)
+        self.pool = pool
+        self.dialect = dialect
+        self.ttl = ttl
+        self.statements = {}
+        # Statement names prepared in each connection's session; keyed on the connection itself (held weakly),
+        # since the id() of a closed connection can be reused by a new one from the pool
+        self._prepared = weakref.WeakKeyDictionary()
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query")
+
+    # Statements use $1, $2 ... placeholders in both dialects
+    def register(self, name, sql):
+        self.statements[name] = sql
+
+    def _execute(self, conn, name, params):
+        sql = self.statements[name]
+        if self.dialect == "sqlite":
+            # sqlite3 keeps its own statement cache; ?NNN is SQLite's numbered placeholder
+            cursor = conn.execute(_placeholder.sub(r"?\1", sql), params)
+        else:
+            cursor = conn.cursor()
+            with self._lock:
+                prepared = self._prepared.setdefault(conn, set())
+            if name not in prepared:
+                cursor.execute(f"PREPARE {name} AS {sql}")
+                prepared.add(name)
+            if params:
+                cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+            else:
+                cursor.execute(f"EXECUTE {name}")
+        columns = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
+        cursor.close()
+        return pd.DataFrame.from_records(rows, columns=columns)
+
+    # After an error the transaction is aborted, but a PREPARE that succeeded before it is not undone
+    # (prepared statements live in the session, not the transaction): roll back and re-read which
+    # statements the session really has, so the next query neither re-prepares nor misses one
+    def _recover(self, conn):
+        with self._lock:
+            self._prepared.pop(conn, None)
+        if getattr(conn, "closed", 0):
+            return
+        try:
+            conn.rollback()
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM pg_prepared_statements")
+            names = {row[0] for row in cursor.fetchall()}
+            cursor.close()
+            conn.rollback()
+        except Exception:
+            # The connection itself is broken; nothing is known to be prepared on it
+            return
+        with self._lock:
+            # Unquoted statement names are folded to lower case by the server
+            self._prepared[conn] = {name for name in self.statements if name.lower() in names}
+
+    def query(self, name, params=(), ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        key = (name, tuple(params))
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        conn = self.pool.getconn()
+        try:
+            data = self._execute(conn, name, tuple(params))
+            if self.dialect != "sqlite":
+                conn.rollback()  # end the read-only transaction before handing the connection back
+        except Exception:
+            if self.dialect != "sqlite":
+                self._recover(conn)
+            raise
+        finally:
+            self.pool.putconn(conn)
+
+        with self._lock:
+            self._cache[key] = (now + ttl, data)
+        return data
+
+    # Run on the worker pool; returns a concurrent.futures.Future
+    def submit(self, name, params=(), ttl=None):
+        return self._executor.submit(self.query, name, params, ttl)
+
+    async def query_async(self, name, params=(), ttl=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.query, name, tuple(params), ttl)
+
+    def invalidate(self, name=None):
+        with self._lock:
+            if name is None:
+                self._cache.clear()
+            else:
+                self._cache = {key: value for key, value in self._cache.items() if key[0] != name}
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.pool.closeall()
+
+
+def postgres_source(ttl=QUERY_TTL, workers=4):
+    return QuerySource(dialect="postgres", ttl=ttl, workers=workers)
+
+
+def sqlite_source(database, ttl=QUERY_TTL, workers=4):
+    return QuerySource(SQLitePool(database, maxconn=workers + 1), dialect="sqlite", ttl=ttl, workers=workers)
@@ -0,0 +1,278 @@
+import csv
+import os
+
+import pandas as pd
+
+from dataloader import csv_files, detect_encoding, sales_files
+from pgsource import db_config, postgres_source, psycopg2
+from tableprovider import format_rate
+
+# Step 1: Warehouse schema. Sales and Returns are appended to; the lookups are small and reloaded whole.
+lookup_tables = {
+    "product_lookup": "product_lookup",
+    "product_subcategories": "product_subcategories",
+    "product_categories": "product_categories",
+    "territory": "territory",
+}
+
+schema_sql = """
+CREATE TABLE IF NOT EXISTS load_log (
+    source text PRIMARY KEY,
+    rows bigint NOT NULL,
+    mtime_ns bigint NOT NULL,
+    size bigint NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sales (
+    orderdate date, stockdate date, ordernumber text, productkey integer, customerkey integer,
+    territorykey integer, orderlineitem integer, orderquantity integer
+);
+CREATE INDEX IF NOT EXISTS sales_orderdate_idx ON sales (orderdate);
+CREATE TABLE IF NOT EXISTS returns (
+    returndate date, territorykey integer, productkey integer, returnquantity integer
+);
+CREATE INDEX IF NOT EXISTS returns_returndate_idx ON returns (returndate);
+CREATE TABLE IF NOT EXISTS product_lookup (
+    productkey integer PRIMARY KEY, productsubcategorykey integer, productsku text, productname text,
+    modelname text, productdescription text, productcolor text, productsize text, productstyle text,
+    productcost numeric, productprice numeric
+);
+CREATE TABLE IF NOT EXISTS product_subcategories (
+    productsubcategorykey integer PRIMARY KEY, subcategoryname text, productcategorykey integer
+);
+CREATE TABLE IF NOT EXISTS product_categories (
+    productcategorykey integer PRIMARY KEY, categoryname text
+);
+CREATE TABLE IF NOT EXISTS territory (
+    salesterritorykey integer PRIMARY KEY, region text, country text, continent text
+);
+
+-- Monthly measures, maintained incrementally: only months touched by a load are recomputed
+CREATE TABLE IF NOT EXISTS monthly_kpis (
+    month date PRIMARY KEY,
+    total_revenue numeric NOT NULL DEFAULT 0,
+    total_cost numeric NOT NULL DEFAULT 0,
+    total_quantity bigint NOT NULL DEFAULT 0,
+    total_orders bigint NOT NULL DEFAULT 0,
+    total_returns bigint NOT NULL DEFAULT 0
+);
+
+-- Distinct counts are not additive across months or categories, so they are materialized views
+CREATE MATERIALIZED VIEW IF NOT EXISTS order_totals AS
+SELECT 1 AS id, COUNT(DISTINCT ordernumber) AS total_orders FROM sales;
+CREATE UNIQUE INDEX IF NOT EXISTS order_totals_key ON order_totals (id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS category_orders AS
+SELECT initcap(trim(c.categoryname)) AS categoryname, COUNT(DISTINCT s.ordernumber) AS total_orders
+FROM sales s
+JOIN product_lookup p ON p.productkey = s.productkey
+JOIN product_subcategories sc ON sc.productsubcategorykey = p.productsubcategorykey
+JOIN product_categories c ON c.productcategorykey = sc.productcategorykey
+GROUP BY 1;
+CREATE UNIQUE INDEX IF NOT EXISTS category_orders_key ON category_orders (categoryname);
+
+CREATE OR REPLACE VIEW business_measures AS
+SELECT
+    COALESCE(SUM(total_revenue), 0) AS total_revenue,
+    COALESCE(SUM(total_cost), 0) AS total_cost,
+    COALESCE(SUM(total_revenue), 0) - COALESCE(SUM(total_cost), 0) AS total_profit,
+    (SELECT total_orders FROM order_totals) AS total_orders,
+    COALESCE(SUM(total_quantity), 0) AS quantity_sold,
+    COALESCE(SUM(total_returns), 0) AS quantity_returned
+FROM monthly_kpis;
+
+CREATE OR REPLACE VIEW monthly_kpis_with_previous AS
+SELECT
+    m.month::date AS "Month",
+    COALESCE(k.total_revenue, 0) AS "Total_Revenue",
+    COALESCE(k.total_cost, 0) AS "Total_Cost",
+    COALESCE(k.total_quantity, 0) AS "Total_Quantity",
+    COALESCE(k.total_orders, 0) AS "Total_Orders",
+    COALESCE(k.total_returns, 0) AS "Total_Returns",
+    LAG(COALESCE(k.total_revenue, 0)) OVER (ORDER BY m.month) AS "Prev_Revenue",
+    LAG(COALESCE(k.total_orders, 0)) OVER (ORDER BY m.month) AS "Prev_Orders",
+    LAG(COALESCE(k.total_returns, 0)) OVER (ORDER BY m.month) AS "Prev_Returns"
+FROM generate_series(
+    (SELECT MIN(month) FROM monthly_kpis), (SELECT MAX(month) FROM monthly_kpis), interval '1 month'
+) AS m(month)
+LEFT JOIN monthly_kpis k ON k.month = m.month::date;
+"""
+
+refresh_sales_months_sql = """
+INSERT INTO monthly_kpis (month, total_revenue, total_cost, total_quantity, total_orders)
+SELECT
+    date_trunc('month', s.orderdate::timestamp)::date,
+    SUM(s.orderquantity * COALESCE(p.productprice, 0)),
+    SUM(s.orderquantity * COALESCE(p.productcost, 0)),
+    SUM(s.orderquantity),
+    COUNT(DISTINCT s.ordernumber)
+FROM sales s
+LEFT JOIN product_lookup p ON p.productkey = s.productkey
+WHERE s.orderdate >= %(start)s AND s.orderdate < %(end)s
+GROUP BY 1
+ON CONFLICT (month) DO UPDATE SET
+    total_revenue = EXCLUDED.total_revenue,
+    total_cost = EXCLUDED.total_cost,
+    total_quantity = EXCLUDED.total_quantity,
+    total_orders = EXCLUDED.total_orders
+"""
+
+refresh_return_months_sql = """
+INSERT INTO monthly_kpis (month, total_returns)
+SELECT date_trunc('month', r.returndate::timestamp)::date, SUM(r.returnquantity)
+FROM returns r
+WHERE r.returndate >= %(start)s AND r.returndate < %(end)s
+GROUP BY 1
+ON CONFLICT (month) DO UPDATE SET total_returns = EXCLUDED.total_returns
+"""
+
+
+def _signature(name):
+    stat = os.stat(csv_files[name])
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Step 2: Bulk load with COPY, skipping the rows a previous load already ingested
+def _copy_csv(cursor, table, name, skip_rows=0):
+    source_path = csv_files[name]
+    with open(source_path, "r", encoding=detect_encoding(source_path), newline="") as f:
+        # Skip whole CSV records, not lines: a quoted field may span several lines. The reader pulls
+        # complete lines from f, so COPY continues from the first record not loaded yet.
+        records = csv.reader(f)
+        for _ in range(skip_rows + 1):  # header, then the rows already loaded
+            next(records, None)
+        cursor.copy_expert(f"COPY {table} FROM STDIN WITH (FORMAT csv)", f)
+        return cursor.rowcount
+
+
+def _log(cursor, name, rows):
+    mtime_ns, size = _signature(name)
+    cursor.execute(
+        "INSERT INTO load_log (source, rows, mtime_ns, size) VALUES (%s, %s, %s, %s) "
+        "ON CONFLICT (source) DO UPDATE SET rows = EXCLUDED.rows, mtime_ns = EXCLUDED.mtime_ns, size = EXCLUDED.size",
+        (name, rows, mtime_ns, size)
+    )
+
+
+# Append new rows of one fact source through a staging table and return the date range they cover
+def _append_fact(cursor, table, date_column, names, log):
+    cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table}_staging (LIKE {table}) ON COMMIT DROP")
+    cursor.execute(f"TRUNCATE {table}_staging")
+
+    loaded = {}
+    for name in names:
+        seen_rows, mtime_ns, size = log.get(name, (0, None, None))
+        if (mtime_ns, size) == _signature(name):
+            continue
+        rows = _copy_csv(cursor, f"{table}_staging", name, skip_rows=seen_rows)
+        loaded[name] = seen_rows + rows
+
+    if not loaded:
+        return None
+    cursor.execute(f"SELECT MIN({date_column}), MAX({date_column}) FROM {table}_staging")
+    first, last = cursor.fetchone()
+    cursor.execute(f"INSERT INTO {table} SELECT * FROM {table}_staging")
+    for name, rows in loaded.items():
+        _log(cursor, name, rows)
+    return first, last
+
+
+def _refresh_months(cursor, sql, date_range):
+    if date_range is None or date_range[0] is None:
+        return
+    start, end = date_range
+    cursor.execute("SELECT date_trunc('month', %s::timestamp)::date, "
+                   "(date_trunc('month', %s::timestamp) + interval '1 month')::date", (start, end))
+    month_start, month_end = cursor.fetchone()
+    cursor.execute(sql, {"start": month_start, "end": month_end})
+
+
+def _fact_was_rewritten(log, names):
+    # Files are expected to only grow; anything smaller than what was loaded means a full reload
+    return any(name in log and os.stat(csv_files[name]).st_size < log[name][2] for name in names)
+
+
+def sync_warehouse(conn=None):
+    own_connection = conn is None
+    if own_connection:
+        conn = psycopg2.connect(**db_config)
+    try:
+        with conn, conn.cursor() as cursor:
+            cursor.execute(schema_sql)
+            cursor.execute("SELECT source, rows, mtime_ns, size FROM load_log")
+            log = {source: (rows, mtime_ns, size) for source, rows, mtime_ns, size in cursor.fetchall()}
+
+            lookups_changed = any(log.get(name, (None,) * 3)[1:] != _signature(name) for name in lookup_tables)
+            if lookups_changed:
+                for name, table in lookup_tables.items():
+                    cursor.execute(f"TRUNCATE {table}")
+                    _log(cursor, name, _copy_csv(cursor, table, name))
+
+            for table, names in [("sales", sales_files), ("returns", ["returns"])]:
+                if _fact_was_rewritten(log, names):
+                    cursor.execute(f"TRUNCATE {table}")
+                    for name in names:
+                        log.pop(name, None)
+                    lookups_changed = True
+
+            sales_range = _append_fact(cursor, "sales", "orderdate", sales_files, log)
+            returns_range = _append_fact(cursor, "returns", "returndate", ["returns"], log)
+
+            if lookups_changed:
+                # Prices changed (or history was reloaded): every month has to be recomputed
+                cursor.execute("TRUNCATE monthly_kpis")
+                cursor.execute(refresh_sales_months_sql, {"start": "-infinity", "end": "infinity"})
+                cursor.execute(refresh_return_months_sql, {"start": "-infinity", "end": "infinity"})
+            else:
+                _refresh_months(cursor, refresh_sales_months_sql, sales_range)
+                _refresh_months(cursor, refresh_return_months_sql, returns_range)
+
+            if sales_range is not None or lookups_changed:
+                cursor.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY order_totals")
+                cursor.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY category_orders")
+    finally:
+        if own_connection:
+            conn.close()
+
+
+# Step 3: Dashboards only read the small aggregated results, through the pooled query source
+_source = None
+
+
+def warehouse_source():
+    global _source
+    if _source is None:
+        _source = postgres_source()
+        _source.register("business_measures", "SELECT * FROM business_measures")
+        _source.register("monthly_kpis", "SELECT * FROM monthly_kpis_with_previous ORDER BY \"Month\"")
+        _source.register("category_orders", "SELECT categoryname, total_orders FROM category_orders ORDER BY categoryname")
+    return _source
+
+
+def warehouse_business_metrics():
+    measures = warehouse_source().query("business_measures").iloc[0]
+    quantity_sold = int(measures["quantity_sold"])
+    quantity_returned = int(measures["quantity_returned"])
+    return {
+        "total_revenue": float(measures["total_revenue"]),
+        "total_profit": float(measures["total_profit"]),
+        "total_orders": int(measures["total_orders"] or 0),
+        "return_rate": format_rate(quantity_returned / quantity_sold if quantity_sold > 0 else float("nan")),
+    }
+
+
+def warehouse_monthly_frame():
+    monthly_data = warehouse_source().query("monthly_kpis").copy()
+    monthly_data["Month"] = pd.to_datetime(monthly_data["Month"])
+    value_columns = [column for column in monthly_data.columns if column != "Month"]
+    monthly_data[value_columns] = monthly_data[value_columns].astype("float64")
+    return monthly_data
+
+
+def warehouse_category_orders():
+    category_orders = warehouse_source().query("category_orders").copy()
+    category_orders["total_orders"] = category_orders["total_orders"].astype("int64")
+    return category_orders
+
+
+if __name__ == "__main__":
+    sync_warehouse()
@@ -0,0 +1,59 @@
+import pandas as pd
+
+# Grain at which sales and returns are aligned; any coarser breakdown is a sum over these cells
+rate_keys = ["Month", "TerritoryKey", "ProductKey"]
+
+
+# Return Rate: DIVIDE([Quantity Returned], [Quantity Sold]). Stays a float: NaN where nothing was sold,
+# "No Sales" is only substituted when the value is displayed (tableprovider.format_rate)
+def return_rate(returned, sold):
+    return returned / sold.where(sold > 0)
+
+
+# Sold, returned and revenue per (month, territory, product). Sales and returns rows are stacked and
+# reduced in one grouped pass, so a cell with returns but no sales in the same month is kept as well.
+class ReturnRates:
+    def __init__(self, fact, returns, territories):
+        self.territories = territories
+        zeros_sales = pd.Series(0, index=range(len(fact)), dtype="int64")
+        zeros_returns = pd.Series(0, index=range(len(returns)), dtype="int64")
+        stacked = pd.DataFrame({
+            "Month": pd.concat([fact["StartOfMonth"], returns["StartOfMonth"]], ignore_index=True),
+            "TerritoryKey": pd.concat([fact["TerritoryKey"], returns["TerritoryKey"]], ignore_index=True),
+            "ProductKey": pd.concat([fact["ProductKey"], returns["ProductKey"]], ignore_index=True),
+            "Sold": pd.concat([fact["OrderQuantity"].astype("int64"), zeros_returns], ignore_index=True),
+            "Returned": pd.concat([zeros_sales, returns["ReturnQuantity"].astype("int64")], ignore_index=True),
+            "Revenue": pd.concat([fact["Revenue"], zeros_returns.astype("float64")], ignore_index=True),
+        })
+        self.cells = stacked.groupby(rate_keys, sort=True).sum().reset_index()
+
+    # Step 1: Any breakdown over the cell keys, with the return rate of each group
+    def rates(self, by, cells=None):
+        cells = self.cells if cells is None else cells
+        grouped = cells.groupby(by, sort=True)[["Sold", "Returned", "Revenue"]].sum()
+        grouped["ReturnRate"] = return_rate(grouped["Returned"], grouped["Sold"])
+        return grouped
+
+    # Step 2: Cells within [start, end] (month starts, inclusive)
+    def window(self, start=None, end=None):
+        mask = pd.Series(True, index=self.cells.index)
+        if start is not None:
+            mask &= self.cells["Month"] >= start
+        if end is not None:
+            mask &= self.cells["Month"] <= end
+        return self.cells[mask]
+
+    # Step 3: One row per territory with its Region / Country / Continent
+    def by_territory(self, start=None, end=None):
+        rates = self.rates("TerritoryKey", self.window(start, end))
+        territories = self.territories.set_index("TerritoryKey")[["Region", "Country", "Continent"]]
+        return territories.join(rates, how="left").fillna({"Sold": 0, "Returned": 0, "Revenue": 0}).reset_index()
+
+    def by_month_and_territory(self, start=None, end=None):
+        rates = self.rates(["Month", "TerritoryKey"], self.window(start, end)).reset_index()
+        regions = self.territories.set_index("TerritoryKey")["Region"]
+        rates["Region"] = regions.reindex(rates["TerritoryKey"]).to_numpy()
+        return rates
+
+    def by_product(self, start=None, end=None):
+        return self.rates("ProductKey", self.window(start, end))
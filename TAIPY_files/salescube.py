@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from distinctcount import DistinctCounter
+
+# Grain of the cube; every filter on the KPI page selects a set of these cells
+cube_dimensions = ["StartOfMonth", "Region", "CategoryName", "SubcategoryName"]
+
+
+def _cells(fact, measures):
+    cells = fact.groupby(cube_dimensions, observed=True, dropna=False)[measures].sum()
+    return cells.reset_index()
+
+
+# Sales and returns pre-aggregated to month x territory x subcategory. Additive measures are summed
+# per cell; distinct orders are kept as (cell, order) pairs, so any selection of cells is answered by
+# masking a few thousand rows instead of re-merging and re-resampling the sales rows.
+class SalesCube:
+    def __init__(self, fact, returns):
+        self.sales = _cells(fact, ["Revenue", "Cost", "OrderQuantity"])
+        self.returns = _cells(returns, ["ReturnQuantity"])
+        self.orders = DistinctCounter(fact["OrderNumber"], fact[cube_dimensions], mode="exact")
+        months = pd.concat([self.sales["StartOfMonth"], self.returns["StartOfMonth"]]).dropna()
+        self.months = pd.DatetimeIndex(months.unique()).sort_values()
+
+    def regions(self):
+        return sorted(self.sales["Region"].dropna().unique())
+
+    def categories(self):
+        return sorted(self.sales["CategoryName"].dropna().unique())
+
+    # Step 1: Cells within [start, end] (both month starts, inclusive) and the selected members;
+    # an empty or missing list of regions/categories means all of them
+    def _mask(self, cells, start=None, end=None, regions=None, categories=None):
+        mask = np.ones(len(cells), dtype=bool)
+        if start is not None:
+            mask &= (cells["StartOfMonth"] >= start).to_numpy()
+        if end is not None:
+            mask &= (cells["StartOfMonth"] <= end).to_numpy()
+        if regions:
+            mask &= cells["Region"].isin(regions).to_numpy()
+        if categories:
+            mask &= cells["CategoryName"].isin(categories).to_numpy()
+        return mask
+
+    # Step 2: Totals over a selection
+    def totals(self, start=None, end=None, regions=None, categories=None):
+        sales = self.sales[self._mask(self.sales, start, end, regions, categories)]
+        returns = self.returns[self._mask(self.returns, start, end, regions, categories)]
+        revenue = float(sales["Revenue"].sum())
+        quantity_sold = int(sales["OrderQuantity"].sum())
+        quantity_returned = int(returns["ReturnQuantity"].sum())
+        return {
+            "revenue": revenue,
+            "profit": revenue - float(sales["Cost"].sum()),
+            "orders": self.orders.count(self._mask(self.orders.keys, start, end, regions, categories)),
+            "quantity_sold": quantity_sold,
+            "quantity_returned": quantity_returned,
+            "return_rate": quantity_returned / quantity_sold if quantity_sold > 0 else None,
+        }
+
+    # Monthly series for a selection, in the layout of the monthly aggregate store (Month, Total_*, Prev_*)
+    def monthly_frame(self, start=None, end=None, regions=None, categories=None):
+        start = self.months[0] if start is None else start
+        end = self.months[-1] if end is None else end
+        sales = self.sales[self._mask(self.sales, start, end, regions, categories)]
+        returns = self.returns[self._mask(self.returns, start, end, regions, categories)]
+        orders = self.orders.rollup("StartOfMonth", mask=self._mask(self.orders.keys, start, end, regions, categories))
+
+        months = pd.date_range(start, end, freq="MS", name="Month")
+        frame = pd.DataFrame({
+            "Total_Revenue": sales.groupby("StartOfMonth")["Revenue"].sum(),
+            "Total_Cost": sales.groupby("StartOfMonth")["Cost"].sum(),
+            "Total_Quantity": sales.groupby("StartOfMonth")["OrderQuantity"].sum(),
+            "Total_Orders": orders[orders > 0],
+            "Total_Returns": returns.groupby("StartOfMonth")["ReturnQuantity"].sum(),
+        }).reindex(months, fill_value=0).astype("float64").fillna(0)
+        frame["Prev_Revenue"] = frame["Total_Revenue"].shift(1)
+        frame["Prev_Orders"] = frame["Total_Orders"].shift(1)
+        frame["Prev_Returns"] = frame["Total_Returns"].shift(1)
+        return frame.rename_axis("Month").reset_index()
@@ -0,0 +1,245 @@
+import csv
+import io
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dataloader import sensor_files
+
+# Seconds between polls of the sensor files, and how many assets keep individual statistics
+SENSOR_POLL_SECONDS = float(os.environ.get("ARCHIOT_SENSOR_POLL_SECONDS", "5"))
+MAX_ASSETS = int(os.environ.get("ARCHIOT_MAX_ASSETS", "10000"))
+
+# Numeric readings tracked per group; the mean of Target is the failure rate
+reading_columns = [
+    "Air temperature [K]",
+    "Process temperature [K]",
+    "Rotational speed [rpm]",
+    "Torque [Nm]",
+    "Tool wear [min]",
+    "Target",
+]
+
+reading_dtypes = {column: "float64" for column in reading_columns}
+reading_dtypes.update({"Asset ID": str, "Product ID": str, "Type": str, "Failure Type": str})
+
+
+# Step 1: Follow a CSV that is appended to, yielding only complete new lines, one block at a time
+class CsvTail:
+    def __init__(self, path, block_size=1 << 20):
+        self.path = path
+        self.block_size = block_size
+        self.offset = 0
+        self.columns = None
+        self.rows = 0
+        self.last_size = None
+
+    # final=True also takes a last line without a newline, e.g. when a finished file is read in one go
+    def read_new(self, final=False):
+        if not os.path.exists(self.path):
+            return
+        size = os.path.getsize(self.path)
+        settled = final or size == self.last_size
+        self.last_size = size
+        if size < self.offset:
+            # Truncated or replaced: start again from the header
+            self.offset = 0
+            self.columns = None
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            if self.columns is None:
+                header = f.readline()
+                if not header.endswith(b"\n"):
+                    return
+                self.columns = next(csv.reader([header.decode("utf-8-sig")]))
+                self.offset = f.tell()
+            while True:
+                block = f.read(self.block_size)
+                end = block.rfind(b"\n")
+                if end < 0:
+                    # Either nothing new, a half-written last line, or a line longer than the block
+                    block += f.readline()
+                    end = block.rfind(b"\n")
+                    if end < 0:
+                        # A last line without a newline is taken once the file stopped growing between
+                        # two polls; before that it may still be half written
+                        if not block.strip() or not settled or self.offset + len(block) != size:
+                            return
+                        end = len(block) - 1
+                block = block[:end + 1]
+                self.offset += len(block)
+                f.seek(self.offset)
+                chunk = pd.read_csv(io.BytesIO(block), header=None, names=self.columns, dtype=reading_dtypes)
+                self.rows += len(chunk)
+                yield chunk
+
+
+# Step 2: Running statistics per group in fixed-size arrays. Each chunk is reduced with bincount
+# and merged into the totals (Chan et al. parallel mean/variance), so memory does not grow with
+# the number of readings. With a capacity, the least recently seen groups are evicted.
+class GroupStats:
+    def __init__(self, columns, capacity=None, alpha=0.05):
+        self.columns = list(columns)
+        self.capacity = capacity
+        self.alpha = alpha
+        self.slots = {}
+        self.tick = 0
+        self._allocate(capacity or 16)
+
+    def _allocate(self, size):
+        width = len(self.columns)
+        self.keys = np.empty(size, dtype=object)
+        self.count = np.zeros(size, dtype=np.int64)
+        self.mean = np.zeros((size, width))
+        self.m2 = np.zeros((size, width))
+        self.ewm = np.zeros((size, width))
+        self.last = np.zeros((size, width))
+        self.last_seen = np.full(size, -1, dtype=np.int64)
+
+    def _grow(self, size):
+        old = (self.keys, self.count, self.mean, self.m2, self.ewm, self.last, self.last_seen)
+        used = len(self.slots)
+        self._allocate(size)
+        for new_array, old_array in zip((self.keys, self.count, self.mean, self.m2, self.ewm, self.last,
+                                         self.last_seen), old):
+            new_array[:used] = old_array[:used]
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _assign_slots(self, keys):
+        slots = np.fromiter((self.slots.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+        new = slots < 0
+        needed = int(new.sum())
+        used = len(self.slots)
+        free = np.arange(used, used + needed)
+
+        if self.capacity and used + needed > self.capacity:
+            # Reuse the slots of the groups that have gone quiet the longest
+            overflow = used + needed - self.capacity
+            candidates = np.setdiff1d(np.arange(used), slots[~new])
+            evicted = candidates[np.argsort(self.last_seen[candidates], kind="stable")[:overflow]]
+            for key in self.keys[evicted]:
+                del self.slots[key]
+            self.count[evicted] = 0
+            self.mean[evicted] = 0
+            self.m2[evicted] = 0
+            free = np.concatenate([evicted, np.arange(used, self.capacity)])
+        elif used + needed > len(self.keys):
+            self._grow(max(2 * len(self.keys), used + needed))
+
+        slots[new] = free[:needed]
+        for key, slot in zip(keys[new], slots[new]):
+            self.slots[key] = slot
+        self.keys[slots[new]] = keys[new]
+        return slots, new
+
+    def update(self, keys, values):
+        codes, uniques = pd.factorize(np.asarray(keys), sort=False)
+        positions = np.arange(len(codes))
+        last_position = np.zeros(len(uniques), dtype=np.int64)
+        np.maximum.at(last_position, codes, positions)
+
+        if self.capacity and len(uniques) > self.capacity:
+            # More groups in one chunk than we can hold: keep the most recent ones only
+            keep = np.argsort(last_position)[-self.capacity:]
+            rows = np.isin(codes, keep)
+            return self.update(np.asarray(keys)[rows], values[rows])
+
+        counts = np.bincount(codes, minlength=len(uniques))
+        sums = np.column_stack([np.bincount(codes, weights=values[:, j], minlength=len(uniques))
+                                for j in range(values.shape[1])])
+        chunk_mean = sums / counts[:, None]
+        deviation = values - chunk_mean[codes]
+        chunk_m2 = np.column_stack([np.bincount(codes, weights=deviation[:, j] ** 2, minlength=len(uniques))
+                                    for j in range(values.shape[1])])
+
+        # Exponentially weighted mean: the newest reading of a group has weight alpha, the one before
+        # alpha * (1 - alpha), and so on; the previous sum decays by (1 - alpha) ** rows. The weighted
+        # sum is kept unnormalized so the result does not depend on how the readings were chunked
+        from_end = counts[codes] - 1 - pd.Series(codes).groupby(codes).cumcount().to_numpy()
+        weights = self.alpha * (1 - self.alpha) ** from_end
+        weighted = np.column_stack([np.bincount(codes, weights=weights * values[:, j], minlength=len(uniques))
+                                    for j in range(values.shape[1])])
+        decay = ((1 - self.alpha) ** counts)[:, None]
+
+        slots, new = self._assign_slots(uniques)
+        n_a = self.count[slots]
+        n = n_a + counts
+        delta = chunk_mean - self.mean[slots]
+        self.mean[slots] += delta * (counts / n)[:, None]
+        self.m2[slots] += chunk_m2 + delta ** 2 * (n_a * counts / n)[:, None]
+        self.count[slots] = n
+        self.ewm[slots] = np.where(new[:, None], weighted, decay * self.ewm[slots] + weighted)
+        self.last[slots] = values[last_position]
+        self.last_seen[slots] = self.tick + last_position
+        self.tick += len(codes)
+
+    def frame(self, key_name, stats=("mean", "std", "ewm", "last")):
+        used = len(self.slots)
+        data = {key_name: self.keys[:used], "Readings": self.count[:used]}
+        count = self.count[:used, None]
+        values = {
+            "mean": self.mean[:used],
+            "std": np.sqrt(np.divide(self.m2[:used], count - 1, out=np.full_like(self.m2[:used], np.nan),
+                                     where=count > 1)),
+            # The weights of `count` readings sum to 1 - (1 - alpha) ** count
+            "ewm": self.ewm[:used] / (1 - (1 - self.alpha) ** count),
+            "last": self.last[:used],
+        }
+        for stat in stats:
+            for j, column in enumerate(self.columns):
+                data[f"{column} {stat}"] = values[stat][:, j]
+        frame = pd.DataFrame(data)
+        frame["Last Seen"] = self.last_seen[:used]
+        return frame
+
+
+# Step 3: The pipeline: tail every sensor file and fold each block into per-Type and per-asset stats
+class SensorPipeline:
+    def __init__(self, names=None, max_assets=MAX_ASSETS, alpha=0.05, block_size=1 << 20):
+        names = names or list(sensor_files)
+        self.tails = {name: CsvTail(sensor_files[name], block_size) for name in names}
+        self.by_type = GroupStats(reading_columns, alpha=alpha)
+        self.by_asset = GroupStats(reading_columns, capacity=max_assets, alpha=alpha)
+        self.failures = {}
+        self._lock = threading.Lock()
+
+    @property
+    def rows(self):
+        return sum(tail.rows for tail in self.tails.values())
+
+    def poll(self, final=False):
+        ingested = 0
+        with self._lock:
+            for tail in self.tails.values():
+                for chunk in tail.read_new(final):
+                    values = chunk[reading_columns].to_numpy(dtype="float64")
+                    # predictive_maintenance1.csv has no Asset ID; the Product ID identifies the unit there
+                    assets = chunk["Asset ID"] if "Asset ID" in chunk.columns else chunk["Product ID"]
+                    self.by_type.update(chunk["Type"].to_numpy(), values)
+                    self.by_asset.update(assets.to_numpy(), values)
+                    for failure, count in chunk["Failure Type"].value_counts().items():
+                        self.failures[failure] = self.failures.get(failure, 0) + int(count)
+                    ingested += len(chunk)
+        return ingested
+
+    def type_summary(self):
+        with self._lock:
+            summary = self.by_type.frame("Type", stats=("mean", "std", "ewm"))
+        summary = summary.drop(columns=["Last Seen", "Target std"])
+        summary = summary.rename(columns={"Target mean": "Failure Rate", "Target ewm": "Recent Failure Rate"})
+        return summary.sort_values("Type").reset_index(drop=True)
+
+    def recent_assets(self, limit=20):
+        with self._lock:
+            assets = self.by_asset.frame("Asset", stats=("last", "ewm"))
+        assets = assets.nlargest(limit, "Last Seen").drop(columns=["Last Seen", "Target ewm"])
+        return assets.rename(columns={"Target last": "Failed"}).reset_index(drop=True)
+
+    def failure_counts(self):
+        with self._lock:
+            counts = pd.Series(self.failures, name="Readings", dtype="int64")
+        return counts.rename_axis("Failure Type").reset_index()
@@ -0,0 +1,71 @@
+from multiprocessing import shared_memory
+
+from dataloader import pa
+from starschema import SalesModel
+
+# Frames of the star-schema model placed in shared memory, one Arrow IPC file per block
+model_frames = ["fact", "returns", "products", "territories"]
+
+# Blocks attached by this process; pandas columns point into them, so they stay open for its lifetime
+_attached = []
+
+
+def _to_arrow_file(frame):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _attach_block(name):
+    try:
+        # Python 3.13+: attaching must not hand the block to this process's resource tracker
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Older versions register the block again; workers started through multiprocessing share the
+        # publisher's resource tracker, so this is a no-op and only the publisher unlinks the block
+        return shared_memory.SharedMemory(name=name)
+
+
+# Step 1: Publisher side. Returns the blocks (to close/unlink on shutdown) and picklable handles
+class SharedFrames:
+    def __init__(self, frames):
+        if pa is None:
+            raise ImportError("pyarrow is required to share frames between processes")
+        self.blocks = []
+        self.handles = {}
+        for name, frame in frames.items():
+            buffer = _to_arrow_file(frame)
+            block = shared_memory.SharedMemory(create=True, size=max(buffer.size, 1))
+            block.buf[:buffer.size] = memoryview(buffer).cast("B")
+            self.blocks.append(block)
+            self.handles[name] = {"block": block.name, "size": buffer.size}
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def publish_sales_model(model):
+    return SharedFrames({name: getattr(model, name) for name in model_frames})
+
+
+# Step 2: Worker side. Arrow reads the columns straight out of the shared block; numeric, date
+# and categorical-code columns are not copied, string columns become Python objects per process.
+def attach_frames(handles):
+    frames = {}
+    for name, handle in handles.items():
+        block = _attach_block(handle["block"])
+        _attached.append(block)
+        buffer = pa.py_buffer(block.buf)[:handle["size"]]
+        table = pa.ipc.open_file(buffer).read_all()
+        frames[name] = table.to_pandas(split_blocks=True)
+    return frames
+
+
+def attach_sales_model(handles):
+    frames = attach_frames(handles)
+    return SalesModel(*(frames[name] for name in model_frames))
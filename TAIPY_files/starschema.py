@@ -0,0 +1,181 @@
+import threading
+
+import pandas as pd
+
+from dataloader import get_table, load_sales, load_table, load_tables, sales_files, source_signature
+from distinctcount import DistinctCounter
+from instrumentation import instrument
+from returnrates import ReturnRates
+from salescube import SalesCube
+
+
+# Fact table plus the small dimension tables it was resolved against.
+# Dimension attributes on the fact table are categoricals, so each row only
+# stores an integer code instead of repeating the product/category/region strings.
+class SalesModel:
+    def __init__(self, fact, returns, products, territories):
+        self.fact = fact
+        self.returns = returns
+        self.products = products
+        self.territories = territories
+
+        self._order_counter = None
+        self._sales_cube = None
+        self._return_rates = None
+
+    def memory_usage(self):
+        return self.fact.memory_usage(deep=True).sum() + self.returns.memory_usage(deep=True).sum()
+
+    # DISTINCTCOUNT(OrderNumber) kept per month x product; rollup("CategoryName"), rollup("StartOfMonth")
+    # or count() answer any coarser slice by merging these groups instead of rescanning the rows
+    def order_counter(self):
+        if self._order_counter is None:
+            self._order_counter = DistinctCounter(
+                self.fact["OrderNumber"],
+                self.fact[["StartOfMonth", "ProductKey", "CategoryName"]]
+            )
+        return self._order_counter
+
+    # Month x territory x subcategory cube behind the KPI filters, built on first use
+    def sales_cube(self):
+        if self._sales_cube is None:
+            self._sales_cube = SalesCube(self.fact, self.returns)
+        return self._sales_cube
+
+    # Sold / returned / revenue aligned per month x territory x product, for return-rate breakdowns
+    def return_rates(self):
+        if self._return_rates is None:
+            self._return_rates = ReturnRates(self.fact, self.returns, self.territories)
+        return self._return_rates
+
+
+def _clean_names(values):
+    return values.astype("string").str.strip().str.title()
+
+
+# Step 1: Resolve Product -> Subcategory -> Category on the ~300 row lookups, not on the fact rows
+def build_product_dimension(product_lookup, product_subcategories, product_categories):
+    products = product_lookup.merge(
+        product_subcategories[["ProductSubcategoryKey", "SubcategoryName", "ProductCategoryKey"]],
+        on="ProductSubcategoryKey",
+        how="left"
+    ).merge(
+        product_categories[["ProductCategoryKey", "CategoryName"]],
+        on="ProductCategoryKey",
+        how="left"
+    )
+    products["SubcategoryName"] = _clean_names(products["SubcategoryName"])
+    products["CategoryName"] = _clean_names(products["CategoryName"])
+    return products.reset_index(drop=True)
+
+
+def build_territory_dimension(territory_lookup):
+    territories = territory_lookup.rename(columns={"SalesTerritoryKey": "TerritoryKey"})
+    return territories.reset_index(drop=True)
+
+
+# Row position of every fact key in the dimension (-1 when the key is unknown)
+def _dimension_positions(keys, dimension, key_column):
+    return pd.Index(dimension[key_column]).get_indexer(keys)
+
+
+def _categorical_from(dimension, positions, column):
+    categories = pd.Index(dimension[column].dropna().unique())
+    codes = categories.get_indexer(dimension[column])
+    # Map fact rows -> dimension rows -> category codes; unknown keys stay -1 (NaN)
+    fact_codes = codes[positions]
+    fact_codes[positions < 0] = -1
+    return pd.Categorical.from_codes(fact_codes, categories=categories)
+
+
+def _attach_dimensions(frame, products, territories):
+    product_pos = _dimension_positions(frame["ProductKey"], products, "ProductKey")
+    for column in ["ProductName", "SubcategoryName", "CategoryName"]:
+        frame[column] = _categorical_from(products, product_pos, column)
+
+    territory_pos = _dimension_positions(frame["TerritoryKey"], territories, "TerritoryKey")
+    for column in ["Region", "Country", "Continent"]:
+        frame[column] = _categorical_from(territories, territory_pos, column)
+    return product_pos
+
+
+# Step 2: Denormalize Sales Data once, with integer-coded dimensions and the row-level measures
+@instrument("merge sales fact")
+def build_sales_fact(sales, products, territories):
+    fact = sales.reset_index(drop=True)
+    product_pos = _attach_dimensions(fact, products, territories)
+
+    known = product_pos >= 0
+    price = products["ProductPrice"].to_numpy()[product_pos]
+    cost = products["ProductCost"].to_numpy()[product_pos]
+    price[~known] = 0
+    cost[~known] = 0
+    fact["ProductPrice"] = price
+    fact["ProductCost"] = cost
+
+    # Total Revenue / Total Cost at row grain: OrderQuantity * RELATED(ProductPrice / ProductCost)
+    fact["Revenue"] = fact["OrderQuantity"] * fact["ProductPrice"]
+    fact["Cost"] = fact["OrderQuantity"] * fact["ProductCost"]
+    fact["StartOfMonth"] = fact["OrderDate"].dt.to_period("M").dt.start_time
+    return fact
+
+
+@instrument("merge returns fact")
+def build_returns_fact(returns, products, territories):
+    fact = returns.reset_index(drop=True)
+    _attach_dimensions(fact, products, territories)
+    fact["StartOfMonth"] = fact["ReturnDate"].dt.to_period("M").dt.start_time
+    return fact
+
+
+def load_dimensions(use_cache=True):
+    names = ["product_lookup", "product_subcategories", "product_categories", "territory"]
+    # The small lookups are shared with any other page that uses them
+    lookups = {name: get_table(name) for name in names} if use_cache else load_tables(*names, use_cache=False)
+    products = build_product_dimension(
+        lookups["product_lookup"], lookups["product_subcategories"], lookups["product_categories"]
+    )
+    territories = build_territory_dimension(lookups["territory"])
+    return products, territories
+
+
+def build_sales_model(use_cache=True):
+    products, territories = load_dimensions(use_cache=use_cache)
+    fact = build_sales_fact(load_sales(use_cache=use_cache), products, territories)
+    returns = build_returns_fact(load_table("returns", use_cache=use_cache), products, territories)
+    return SalesModel(fact, returns, products, territories)
+
+
+model_sources = sales_files + ["returns", "product_lookup", "product_subcategories", "product_categories", "territory"]
+
+# Step 3: One model per process, shared by every page that imports it
+_model = None
+_model_signature = None
+_model_lock = threading.Lock()
+
+
+def load_sales_model():
+    with _model_lock:
+        if _model is not None:
+            return _model
+    return refresh_sales_model()
+
+
+# Rebuild only when a source file changed since the model was built; otherwise this is a few stat() calls
+def refresh_sales_model():
+    global _model, _model_signature
+    with _model_lock:
+        signature = source_signature(model_sources)
+        if _model is None or signature != _model_signature:
+            _model = build_sales_model()
+            _model_signature = signature
+        return _model
+
+
+# Use a model built elsewhere (e.g. attached from shared memory by a worker process). It is kept
+# until the sources change from the signature it was built for.
+def install_sales_model(model, signature):
+    global _model, _model_signature
+    with _model_lock:
+        _model = model
+        _model_signature = signature
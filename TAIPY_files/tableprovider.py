@@ -0,0 +1,70 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+
+# Sort / filter / page a summary frame on the server and return only the visible window.
+# Sort orders are computed once per column and text filters once per search string, so paging
+# through a large table is a slice of a precomputed index array instead of a new sort.
+class TableProvider:
+    def __init__(self, frame, search_columns=None, formatters=None, page_size=10, max_cached_filters=32):
+        self.frame = frame.reset_index(drop=True)
+        self.page_size = page_size
+        self.formatters = formatters or {}
+        self.max_cached_filters = max_cached_filters
+        search_columns = search_columns or [c for c in self.frame.columns if self.frame[c].dtype == object]
+        # Lower-cased searchable text, built once
+        self._search_text = self.frame[search_columns].astype("string").fillna("").agg(" ".join, axis=1).str.lower()
+        self._orders = {}
+        self._filters = {}
+
+    def __len__(self):
+        return len(self.frame)
+
+    def _sort_order(self, column):
+        if column not in self._orders:
+            # Stable sort with missing values last, so equal keys keep their original order
+            self._orders[column] = self.frame[column].sort_values(kind="stable", na_position="last").index.to_numpy()
+        return self._orders[column]
+
+    def _filter_mask(self, search):
+        search = (search or "").strip().lower()
+        if not search:
+            return None
+        if search not in self._filters:
+            if len(self._filters) >= self.max_cached_filters:
+                self._filters.pop(next(iter(self._filters)))
+            self._filters[search] = self._search_text.str.contains(search, regex=False).to_numpy()
+        return self._filters[search]
+
+    def row_order(self, search="", sort_by=None, descending=False):
+        if sort_by:
+            order = self._sort_order(sort_by)
+            if descending:
+                # Reverse the non-missing part only, missing values stay at the end
+                valid = self.frame[sort_by].notna().to_numpy()[order]
+                order = np.concatenate([order[valid][::-1], order[~valid]])
+        else:
+            order = np.arange(len(self.frame))
+        mask = self._filter_mask(search)
+        if mask is not None:
+            order = order[mask[order]]
+        return order
+
+    # Returns (window, matching row count, page count); `page` is 1-based and clamped to the valid range
+    def page(self, page=1, search="", sort_by=None, descending=False, page_size=None):
+        page_size = page_size or self.page_size
+        order = self.row_order(search, sort_by, descending)
+        page_count = max(1, math.ceil(len(order) / page_size))
+        page = min(max(1, page), page_count)
+        start = (page - 1) * page_size
+        window = self.frame.iloc[order[start:start + page_size]].copy()
+        # Formatting is a display concern and only applies to the rows being sent
+        for column, formatter in self.formatters.items():
+            window[column] = window[column].map(formatter).astype(object)
+        return window.reset_index(drop=True), len(order), page_count
+
+
+def format_rate(value, missing="No Sales"):
+    return missing if pd.isna(value) else f"{value:.2%}"
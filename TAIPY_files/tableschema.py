@@ -0,0 +1,44 @@
+import pandas as pd
+
+# Column types of a table, from a [schemas.<name>] section of datasources.toml:
+#   dates       parsed once, when the columnar cache is built
+#   integers    column -> dtype, e.g. keys downcast to int16/int32 ("Int8" etc. when values can be missing)
+#   categories  stored as integer codes plus a dictionary of the distinct values (colors, sizes, names,
+#               and OrderNumber: "SO61285" becomes a small integer code)
+#   fill        column -> value for missing entries, e.g. prices without a value count as 0
+#   key         rows whose key is not a number (blank or export footer lines) are dropped
+
+
+# Dtypes that can be given to the CSV parser directly. Integer columns only when no key cleaning
+# is needed, since a footer line would make the parse fail.
+def read_dtypes(schema):
+    if not schema:
+        return None
+    dtypes = {column: "category" for column in schema.get("categories", [])}
+    if "key" not in schema:
+        dtypes.update(schema.get("integers", {}))
+    return dtypes or None
+
+
+def apply_schema(frame, schema):
+    if not schema:
+        return frame
+    key = schema.get("key")
+    if key is not None:
+        keys = pd.to_numeric(frame[key], errors="coerce")
+        frame = frame[keys.notna()].assign(**{key: keys[keys.notna()]}).reset_index(drop=True)
+
+    columns = {}
+    for column in schema.get("dates", []):
+        if column in frame.columns and not pd.api.types.is_datetime64_any_dtype(frame[column]):
+            columns[column] = pd.to_datetime(frame[column], errors="coerce")
+    for column, value in schema.get("fill", {}).items():
+        if column in frame.columns and frame[column].isna().any():
+            columns[column] = frame[column].fillna(value)
+    for column, dtype in schema.get("integers", {}).items():
+        if column in frame.columns and frame[column].dtype != dtype:
+            columns[column] = columns.get(column, frame[column]).astype(dtype)
+    for column in schema.get("categories", []):
+        if column in frame.columns and not isinstance(frame[column].dtype, pd.CategoricalDtype):
+            columns[column] = frame[column].astype("category")
+    return frame.assign(**columns) if columns else frame
@@ -0,0 +1,55 @@
+from taipy.gui import Gui
+
+import taipydashboardbarandline
+import taipydashboardbarlinekpimetrics
+import taipydashboardbarplot
+import taipydashboardcards
+import taipydashboardcustomers
+import taipydashboardfull
+import taipydashboardKPI
+import taipydashboardlinechart
+import taipydashboardtable
+import taipydashboardterritories
+from businessmetrics import assign_values, start_periodic_refresh
+from diagnosticspage import diagnostics_page
+
+# One process serving every dashboard. Each page module is imported once: the star-schema model,
+# the monthly aggregate store and the loaded tables are shared by all of them, and each page keeps
+# its variables in its own module, so switching pages does not load anything again.
+
+# Step 1: Register the pages, with a navigation bar on top of all of them
+pages = {
+    "/": "<|navbar|>",
+    "kpi": taipydashboardKPI.layout,
+    "cards": taipydashboardcards.layout,
+    "metrics": taipydashboardbarlinekpimetrics.layout,
+    "table": taipydashboardtable.page,
+    "orders": taipydashboardbarplot.page,
+    "revenue": taipydashboardlinechart.page,
+    "overview": taipydashboardfull.page,
+    "orders-and-revenue": taipydashboardbarandline.page,
+    "customers": taipydashboardcustomers.page,
+    "territories": taipydashboardterritories.page,
+    "diagnostics": diagnostics_page,
+}
+
+# Step 2: Background refresh for the pages that have one, each updating its own module's variables
+refreshed_pages = [
+    (taipydashboardKPI, taipydashboardKPI.compute_kpis, taipydashboardKPI.on_data_refresh),
+    (taipydashboardcards, taipydashboardcards.compute_metrics, assign_values),
+    (taipydashboardbarlinekpimetrics, taipydashboardbarlinekpimetrics.compute_metrics, assign_values),
+    (taipydashboardcustomers, taipydashboardcustomers.compute_customers, taipydashboardcustomers.on_data_refresh),
+    (taipydashboardterritories, taipydashboardterritories.compute_territories,
+     taipydashboardterritories.on_data_refresh),
+]
+
+
+def create_gui():
+    gui = Gui(pages=pages)
+    for module, compute, callback in refreshed_pages:
+        start_periodic_refresh(gui, compute, module_context=module.__name__, callback=callback)
+    return gui
+
+
+if __name__ == "__main__":
+    create_gui().run(title="AdventureWorks Dashboards")
@@ -1,102 +1,108 @@
 import pandas as pd
-from taipy.gui import Gui
-
-# Step 1: Load Data from Multiple CSV Files with Encoding Handling
-csv_files = {
-    "calendar": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Calendar Lookup.csv",
-    "customer": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Customer Lookup.csv",
-    "product_categories": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Product Categories Lookup.csv",
-    "product_lookup": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Product Lookup.csv",
-    "product_subcategories": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Product Subcategories Lookup.csv",
-    "returns": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Returns Data.csv",
-    "sales_2020": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Sales Data 2020.csv",
-    "sales_2021": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Sales Data 2021.csv",
-    "sales_2022": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Sales Data 2022.csv",
-    "unpivot_demo": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/Product Category Sales (Unpivot Demo).csv"
-}
-
-# Load CSV files into DataFrames with appropriate encoding
-sales_2020_df = pd.read_csv(csv_files["sales_2020"], encoding='ISO-8859-1')
-sales_2021_df = pd.read_csv(csv_files["sales_2021"], encoding='ISO-8859-1')
-sales_2022_df = pd.read_csv(csv_files["sales_2022"], encoding='ISO-8859-1')
-calendar_df = pd.read_csv(csv_files["calendar"], encoding='ISO-8859-1')
-customer_df = pd.read_csv(csv_files["customer"], encoding='ISO-8859-1')
-product_categories_df = pd.read_csv(csv_files["product_categories"], encoding='ISO-8859-1')
-product_lookup_df = pd.read_csv(csv_files["product_lookup"], encoding='ISO-8859-1')
-product_subcategories_df = pd.read_csv(csv_files["product_subcategories"], encoding='ISO-8859-1')
-returns_df = pd.read_csv(csv_files["returns"], encoding='ISO-8859-1')
-
-# Debugging: Print column names and first few rows to check
-print("Columns in calendar_df:", list(calendar_df.columns))
-print("Columns in product_lookup_df:", list(product_lookup_df.columns))
-print(calendar_df.head())  # Check the first few rows
-
-# Convert 'Date' to datetime
-calendar_df['Date'] = pd.to_datetime(calendar_df['Date'], errors='coerce')
-
-# Create 'Start of Month' from 'Date'
-calendar_df['Start of Month'] = calendar_df['Date'].dt.to_period('M').dt.to_timestamp()
+from taipy.gui import Gui, Markdown
+
+from businessmetrics import assign_values, load_month_kpis, month_kpis, start_periodic_refresh
+from dataloader import get_table
+from diagnosticspage import diagnostics_page
+from instrumentation import timed
+from starschema import load_sales_model, refresh_sales_model
+
+# Step 1: Load Data from the shared columnar cache; only the tables this page uses are loaded
+calendar_df = get_table("calendar")
+
+# Load timings and row counts are recorded by the instrumentation layer (see the Diagnostics page)
+with timed("prepare calendar", rows=len(calendar_df)):
+    # 'Date' is parsed when the table is cached. The loaded table is shared with other pages,
+    # so 'Start of Month' is added on a copy
+    calendar_df = calendar_df.assign(**{'Start of Month': calendar_df['Date'].dt.to_period('M').dt.to_timestamp()})
 
 # Step 2: Data Preparation
-# Convert date columns to datetime with error handling
-sales_2020_df['OrderDate'] = pd.to_datetime(sales_2020_df['OrderDate'], errors='coerce')
-sales_2021_df['OrderDate'] = pd.to_datetime(sales_2021_df['OrderDate'], errors='coerce')
-sales_2022_df['OrderDate'] = pd.to_datetime(sales_2022_df['OrderDate'], errors='coerce')
-
-# Combine sales data from all years
-sales_df = pd.concat([sales_2020_df, sales_2021_df, sales_2022_df])
-
-# Merge with Product Lookup to get Product Price
-sales_df = sales_df.merge(product_lookup_df[['ProductKey', 'ProductPrice']], on='ProductKey', how='left')
-
-# Calculate Total Revenue
-sales_df['Revenue'] = sales_df['OrderQuantity'] * sales_df['ProductPrice']
-
-# Ensure the datetime column is used as an index for resampling
-sales_df.set_index('OrderDate', inplace=True)
-returns_df['ReturnDate'] = pd.to_datetime(returns_df['ReturnDate'], errors='coerce')
-returns_df.set_index('ReturnDate', inplace=True)
-
-# Calculate monthly revenue, orders, and returns
-monthly_data = sales_df.resample('M').agg(
-    Total_Revenue=('Revenue', 'sum'),
-    Total_Orders=('OrderNumber', 'nunique'),
-).reset_index()
-
-monthly_returns = returns_df.resample('M').agg(
-    Total_Returns=('ReturnQuantity', 'sum')
-).reset_index()
-
-# Merge monthly data and returns
-monthly_data = pd.merge(
-    monthly_data, monthly_returns,
-    left_on='OrderDate', right_on='ReturnDate', how='outer'
-)
-
-# Calculate Previous Month Values
-monthly_data['Prev_Revenue'] = monthly_data['Total_Revenue'].shift(1)
-monthly_data['Prev_Orders'] = monthly_data['Total_Orders'].shift(1)
-monthly_data['Prev_Returns'] = monthly_data['Total_Returns'].shift(1)
+# Latest month, previous month and trends. Sales and Returns are partitioned by month, so only the
+# partitions of these two months are read (or the warehouse's monthly_kpis table is queried)
+kpis = load_month_kpis()
 
 # Step 3: Prepare Data for GUI
-# Latest Month Data
-latest_data = monthly_data.iloc[-1]
-monthly_revenue = latest_data['Total_Revenue'] or 0
-monthly_orders = latest_data['Total_Orders'] or 0
-monthly_returns = latest_data['Total_Returns'] or 0
-
-# Previous Month Values
-prev_revenue = latest_data['Prev_Revenue'] or 0
-prev_orders = latest_data['Prev_Orders'] or 0
-prev_returns = latest_data['Prev_Returns'] or 0
-
-# KPI Trends
-revenue_trend = ((monthly_revenue - prev_revenue) / prev_revenue * 100) if prev_revenue else 0
-orders_trend = ((monthly_orders - prev_orders) / prev_orders * 100) if prev_orders else 0
-returns_trend = ((monthly_returns - prev_returns) / prev_returns * 100) if prev_returns else 0
-
-# Step 4: Create Taipy GUI with KPI Indicators
-layout = """
+monthly_revenue = kpis["monthly_revenue"]
+monthly_orders = kpis["monthly_orders"]
+monthly_returns = kpis["monthly_returns"]
+prev_revenue = kpis["prev_revenue"]
+prev_orders = kpis["prev_orders"]
+prev_returns = kpis["prev_returns"]
+revenue_trend = kpis["revenue_trend"]
+orders_trend = kpis["orders_trend"]
+returns_trend = kpis["returns_trend"]
+
+
+# Step 4: Filtered view. The month x territory x subcategory cube answers any date range, territory
+# and category selection without going back to the sales rows
+cube = load_sales_model().sales_cube()
+month_labels = [month.strftime("%Y-%m") for month in cube.months]
+region_names = cube.regions()
+category_names = cube.categories()
+month_range = [month_labels[0], month_labels[-1]]
+region_filter = []
+category_filter = []
+
+
+# Period totals plus the last selected month against the month before it
+def filtered_kpis(month_range, regions, categories):
+    cube = load_sales_model().sales_cube()
+    start, end = (pd.Timestamp(label) for label in month_range)
+    with timed("filter kpi cube"):
+        totals = cube.totals(start, end, regions, categories)
+        month = month_kpis(cube.monthly_frame(end - pd.DateOffset(months=1), end, regions, categories))
+    return {
+        "selected_revenue": totals["revenue"],
+        "selected_profit": totals["profit"],
+        "selected_orders": totals["orders"],
+        # DIVIDE([Quantity Returned], [Quantity Sold], "No Sales")
+        "selected_return_rate": "No Sales" if totals["return_rate"] is None else f"{totals['return_rate']:.2%}",
+        "selected_month": month_range[1],
+        "selected_month_revenue": month["monthly_revenue"],
+        "selected_month_orders": month["monthly_orders"],
+        "selected_month_returns": month["monthly_returns"],
+        "selected_revenue_trend": month["revenue_trend"],
+        "selected_orders_trend": month["orders_trend"],
+        "selected_returns_trend": month["returns_trend"],
+    }
+
+
+filtered = filtered_kpis(month_range, region_filter, category_filter)
+selected_revenue = filtered["selected_revenue"]
+selected_profit = filtered["selected_profit"]
+selected_orders = filtered["selected_orders"]
+selected_return_rate = filtered["selected_return_rate"]
+selected_month = filtered["selected_month"]
+selected_month_revenue = filtered["selected_month_revenue"]
+selected_month_orders = filtered["selected_month_orders"]
+selected_month_returns = filtered["selected_month_returns"]
+selected_revenue_trend = filtered["selected_revenue_trend"]
+selected_orders_trend = filtered["selected_orders_trend"]
+selected_returns_trend = filtered["selected_returns_trend"]
+
+
+def on_filter_change(state, var_name, value):
+    assign_values(state, filtered_kpis(state.month_range, state.region_filter, state.category_filter))
+
+
+# Step 5: Refresh. The headline re-reads the two latest month partitions; the model (and its cube)
+# is rebuilt only when a source file changed, then each client's own filters are applied again
+def compute_kpis():
+    refresh_sales_model()
+    return load_month_kpis()
+
+
+def on_data_refresh(state, values):
+    assign_values(state, values)
+    on_filter_change(state, None, None)
+
+
+def on_refresh(state):
+    on_data_refresh(state, compute_kpis())
+
+
+# Step 6: Create Taipy GUI with KPI Indicators
+layout = Markdown("""
 # KPI Dashboard
 
 <|{monthly_revenue}|indicator|format=$,.2f|type=number|label=Revenue (Current Month)|>
@@ -113,7 +119,30 @@ Previous Month: <|{prev_orders:,.0f}|text|>
 Current Returns: <|{monthly_returns:,.0f}|text|>  
 Trend: <|{returns_trend:.2f}|text|suffix=%|>  
 Previous Month: <|{prev_returns:,.0f}|text|>
-"""
 
-gui = Gui(page=layout)
-gui.run()
+<|Refresh|button|on_action=on_refresh|>
+
+## Explore
+
+<|{month_range}|slider|lov={month_labels}|text_anchor=bottom|on_change=on_filter_change|>
+
+<|{region_filter}|selector|lov={region_names}|multiple|dropdown|label=Territory|on_change=on_filter_change|>
+<|{category_filter}|selector|lov={category_names}|multiple|dropdown|label=Category|on_change=on_filter_change|>
+
+Revenue: <|{selected_revenue:,.2f}|text|prefix=$|>  
+Profit: <|{selected_profit:,.2f}|text|prefix=$|>  
+Orders: <|{selected_orders:,.0f}|text|>  
+Return Rate: <|{selected_return_rate}|text|>
+
+<|{selected_month_revenue}|indicator|format=$,.2f|type=number|label=Revenue (Last Selected Month)|>
+<|{selected_month}|text|>: <|{selected_month_revenue:,.2f}|text|prefix=$|> (<|{selected_revenue_trend:.2f}|text|suffix=%|>)  
+Orders: <|{selected_month_orders:,.0f}|text|> (<|{selected_orders_trend:.2f}|text|suffix=%|>)  
+Returns: <|{selected_month_returns:,.0f}|text|> (<|{selected_returns_trend:.2f}|text|suffix=%|>)
+""")
+
+# KPI page plus the built-in diagnostics page, with a navigation bar between them.
+# taipyapp.py serves this page together with the other dashboards.
+if __name__ == "__main__":
+    gui = Gui(pages={"/": "<|navbar|>", "kpi": layout, "diagnostics": diagnostics_page})
+    start_periodic_refresh(gui, compute_kpis, callback=on_data_refresh)
+    gui.run()
@@ -0,0 +1,119 @@
+import taipy.gui as tg
+import taipy.gui.builder as tgb
+
+from businessmetrics import assign_values
+from customeranalytics import load_customer_analytics
+from tableprovider import TableProvider
+
+# Step 1: Customer analytics over Sales Data joined to Customer Lookup on CustomerKey,
+# built once per refresh and shared by every client
+analytics = load_customer_analytics()
+
+# Step 2: RFM segments and cohort retention
+# Plain strings for the browser; the segment order is already applied by the analytics
+def segment_table(analytics):
+    return analytics.segment_summary().astype({"Segment": str})
+
+
+def retention_percent(cohort_retention):
+    columns = [column for column in cohort_retention.columns if column.startswith("M")]
+    return cohort_retention.assign(**{column: cohort_retention[column] * 100 for column in columns})
+
+
+segment_summary = segment_table(analytics)
+cohort_retention = retention_percent(analytics.cohort_retention())
+retention_columns = [column for column in cohort_retention.columns if column.startswith("M")]
+
+
+# Step 3: Customers ranked by revenue, orders or recency; sorted, searched and paged on the server
+def customer_table(analytics):
+    return TableProvider(
+        analytics.rfm()[["CustomerName", "Orders", "Revenue", "RecencyDays", "RFM", "Segment"]].astype({"Segment": str}),
+        search_columns=["CustomerName", "Segment"],
+        page_size=15
+    )
+
+
+customers = customer_table(analytics)
+sort_columns = ["Revenue", "Orders", "RecencyDays", "RFM", "CustomerName"]
+search_text = ""
+sort_column = "Revenue"
+sort_descending = True
+page_number = 1
+customer_page, matching_rows, page_count = customers.page(page_number, search_text, sort_column, sort_descending)
+page_info = f"Page {page_number} of {page_count} ({matching_rows} customers)"
+
+
+def update_page(state, page_number):
+    window, rows, pages = customers.page(page_number, state.search_text, state.sort_column, state.sort_descending)
+    state.page_number = min(max(1, page_number), pages)
+    state.customer_page = window
+    state.page_info = f"Page {state.page_number} of {pages} ({rows} customers)"
+
+
+def on_filter_change(state, var_name, value):
+    update_page(state, 1)
+
+
+def on_previous(state):
+    update_page(state, state.page_number - 1)
+
+
+def on_next(state):
+    update_page(state, state.page_number + 1)
+
+
+# Step 4: Rebuilt only when the sales model or the Customer Lookup was reloaded
+def compute_customers():
+    global customers
+    analytics = load_customer_analytics()
+    customers = customer_table(analytics)
+    return {"segment_summary": segment_table(analytics), "cohort_retention": retention_percent(analytics.cohort_retention())}
+
+
+def on_data_refresh(state, values):
+    assign_values(state, values)
+    update_page(state, state.page_number)
+
+
+# Step 5: Create the Page
+with tgb.Page() as page:
+    tgb.text("# Customers", mode="md")
+    tgb.chart(
+        "{segment_summary}",
+        type="bar",
+        x="Segment",
+        y="Customers",
+        title="Customers by RFM Segment",
+        width="80%",
+        margin_left="5%"
+    )
+    tgb.table("{segment_summary}", title="RFM Segments", show_all=True, width="80%", margin_left="5%")
+    tgb.table(
+        "{cohort_retention}",  # Share of each first-order month still ordering n months later
+        title="Cohort Retention",
+        # Percent format on the retention columns only; Customers is a count
+        columns={"Cohort": {}, "Customers": {}, **{column: {"format": "%.1f%%"} for column in retention_columns}},
+        page_size=12,
+        width="95%"
+    )
+    tgb.input("{search_text}", label="Search customers", change_delay=300, on_change=on_filter_change)
+    tgb.selector("{sort_column}", lov=sort_columns, dropdown=True, label="Sort by", on_change=on_filter_change)
+    tgb.toggle("{sort_descending}", label="Descending", on_change=on_filter_change)
+    tgb.table(
+        "{customer_page}",  # Only the visible window is sent to the browser
+        title="Customers",
+        columns=["CustomerName", "Orders", "Revenue", "RecencyDays", "RFM", "Segment"],
+        headers=["Customer", "Orders", "Revenue", "Days Since Last Order", "RFM", "Segment"],
+        show_all=True,
+        sortable=False,
+        width="80%",
+        margin_left="10%"
+    )
+    tgb.button("Previous", on_action=on_previous)
+    tgb.text("{page_info}")
+    tgb.button("Next", on_action=on_next)
+
+# Step 6: Run the Taipy GUI
+if __name__ == "__main__":
+    tg.Gui(page).run()
@@ -0,0 +1,73 @@
+import threading
+
+import pandas as pd
+from taipy.gui import Gui, Markdown
+
+from businessmetrics import assign_values, start_periodic_refresh
+from dataloader import sensor_files
+from failurerisk import load_failure_model
+from sensorstream import SENSOR_POLL_SECONDS, CsvTail
+
+# Step 1: Load the serialized failure-risk model (trained from the Target labels on first use)
+model = load_failure_model()
+tail = CsvTail(sensor_files["predictive_maintenance"])
+
+# Only the highest-risk readings and the per-type counts are kept between polls
+scored_state = {"top_risk": pd.DataFrame(), "counts": pd.Series(dtype="int64")}
+# The periodic refresh and the Refresh button both read the tail; one at a time, like SensorPipeline.poll
+score_lock = threading.Lock()
+
+
+# Step 2: Score every newly arrived block of readings as one batch
+def compute_risk_view(limit=20):
+    with score_lock:
+        for chunk in tail.read_new():
+            scored = chunk[["Asset ID", "Type", "Failure Type"]].join(model.score(chunk))
+            top_risk = pd.concat([scored_state["top_risk"], scored.nlargest(limit, "Failure Probability")])
+            scored_state["top_risk"] = top_risk.nlargest(limit, "Failure Probability").reset_index(drop=True)
+            scored_state["counts"] = scored_state["counts"].add(scored["Predicted Failure Type"].value_counts(),
+                                                                fill_value=0)
+        counts = scored_state["counts"].astype("int64").rename("Readings").rename_axis("Predicted Failure Type")
+        readings_scored = tail.rows
+        top_risk = scored_state["top_risk"]
+    return {
+        "readings_scored": readings_scored,
+        "at_risk": int(counts.drop("No Failure", errors="ignore").sum()),
+        "top_risk": top_risk,
+        "predicted_counts": counts.reset_index(),
+    }
+
+
+view = compute_risk_view()
+readings_scored = view["readings_scored"]
+at_risk = view["at_risk"]
+top_risk = view["top_risk"]
+predicted_counts = view["predicted_counts"]
+
+
+def on_refresh(state):
+    assign_values(state, compute_risk_view())
+
+
+# Step 3: Create the Taipy GUI layout
+layout = Markdown("""
+# Predictive Maintenance - Failure Risk
+
+<|{readings_scored:,}|indicator|label=Readings Scored|>
+<|{at_risk:,}|indicator|label=Predicted Failures|>
+
+## Predicted Failure Types
+<|{predicted_counts}|chart|type=bar|x=Predicted Failure Type|y=Readings|title=Predicted Failure Types|>
+
+## Highest Risk Readings
+<|{top_risk}|table|page_size=10|>
+
+<|Refresh|button|on_action=on_refresh|>
+""")
+
+
+# Step 4: Run the Taipy GUI, scoring new readings in the background
+if __name__ == "__main__":
+    gui = Gui(page=layout)
+    start_periodic_refresh(gui, compute_risk_view, interval=SENSOR_POLL_SECONDS)
+    gui.run()
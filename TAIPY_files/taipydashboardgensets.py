@@ -0,0 +1,65 @@
+from taipy.gui import Gui, Markdown
+
+from businessmetrics import assign_values, start_periodic_refresh
+from gensetmaintenance import DUE_WITHIN_READINGS, SERVICE_INTERVAL_MINUTES, GensetStateStore
+
+# Step 1: Load the persisted per-generator state and fold in any readings added since the last run
+store = GensetStateStore()
+store.sync()
+
+display_columns = [
+    "Asset ID", "Running Minutes", "Last Scheduled Service", "Next Scheduled Service", "Minutes To Service",
+    "Readings To Service", "Coolant Temp (C)", "Oil Pressure (psi)", "Battery Voltage (V)",
+]
+
+
+# Step 2: Service schedule for every genset, and the ones due soon
+def compute_genset_view():
+    store.sync()
+    schedule = store.schedule()
+    due = schedule[schedule["Due"]]
+    return {
+        "genset_count": len(schedule),
+        "due_count": len(due),
+        "due_gensets": due[display_columns].round(2),
+        "all_gensets": schedule[display_columns].round(2),
+    }
+
+
+view = compute_genset_view()
+genset_count = view["genset_count"]
+due_count = view["due_count"]
+due_gensets = view["due_gensets"]
+all_gensets = view["all_gensets"]
+
+
+def on_refresh(state):
+    assign_values(state, compute_genset_view())
+
+
+# Step 3: Create the Taipy GUI layout
+layout = Markdown(f"""
+# Diesel Generator Maintenance
+
+<|{{genset_count:,}}|indicator|label=Generators|>
+<|{{due_count:,}}|indicator|label=Due Within {DUE_WITHIN_READINGS:g} Readings|>
+
+Nominal schedule: a service every {SERVICE_INTERVAL_MINUTES:g} running minutes. The readings carry no service records.
+
+## Generators Due for Maintenance
+<|{{due_gensets}}|table|page_size=10|>
+
+## Minutes to Next Scheduled Service
+<|{{all_gensets}}|chart|type=bar|x=Asset ID|y=Minutes To Service|title=Minutes to Next Scheduled Service|>
+
+## All Generators
+<|{{all_gensets}}|table|page_size=10|>
+
+<|Refresh|button|on_action=on_refresh|>
+""")
+
+# Step 4: Run the Taipy GUI, refreshing every connected session in the background
+if __name__ == "__main__":
+    gui = Gui(page=layout)
+    start_periodic_refresh(gui, compute_genset_view)
+    gui.run()
@@ -0,0 +1,62 @@
+from taipy.gui import Gui, Markdown
+
+from businessmetrics import assign_values, start_periodic_refresh
+from sensorstream import SENSOR_POLL_SECONDS, SensorPipeline
+
+# Step 1: Stream the predictive-maintenance readings in blocks; only running statistics are kept,
+# never the readings themselves
+pipeline = SensorPipeline()
+pipeline.poll()
+
+
+# Step 2: Values shown on the page
+def compute_sensor_view():
+    pipeline.poll()
+    return {
+        "rows_ingested": pipeline.rows,
+        "assets_tracked": len(pipeline.by_asset),
+        "type_stats": pipeline.type_summary(),
+        "recent_assets": pipeline.recent_assets(),
+        "failure_counts": pipeline.failure_counts(),
+    }
+
+
+view = compute_sensor_view()
+rows_ingested = view["rows_ingested"]
+assets_tracked = view["assets_tracked"]
+type_stats = view["type_stats"]
+recent_assets = view["recent_assets"]
+failure_counts = view["failure_counts"]
+
+
+def on_refresh(state):
+    assign_values(state, compute_sensor_view())
+
+
+# Step 3: Create the Taipy GUI layout
+layout = Markdown("""
+# Predictive Maintenance - Live Sensor Statistics
+
+<|{rows_ingested:,}|indicator|label=Readings Ingested|>
+<|{assets_tracked:,}|indicator|label=Assets Tracked|>
+
+## Statistics by Machine Type
+<|{type_stats}|table|page_size=5|>
+
+## Failure Rate by Machine Type
+<|{type_stats}|chart|type=bar|x=Type|y[1]=Failure Rate|y[2]=Recent Failure Rate|title=Failure Rate by Type|>
+
+## Failures Seen
+<|{failure_counts}|chart|type=bar|x=Failure Type|y=Readings|title=Readings by Failure Type|>
+
+## Most Recently Seen Assets
+<|{recent_assets}|table|page_size=10|>
+
+<|Refresh|button|on_action=on_refresh|>
+""")
+
+# Step 4: Run the Taipy GUI, polling the sensor files in the background
+if __name__ == "__main__":
+    gui = Gui(page=layout)
+    start_periodic_refresh(gui, compute_sensor_view, interval=SENSOR_POLL_SECONDS)
+    gui.run()
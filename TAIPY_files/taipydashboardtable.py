@@ -2,86 +2,92 @@ import pandas as pd
 import taipy.gui as tg
 import taipy.gui.builder as tgb
 
-# Step 1: Load Data from Multiple CSV Files
-csv_files = {
-    "calendar": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Calendar Lookup.csv",
-    "customer": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Customer Lookup.csv",
-    "product_categories": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Product Categories Lookup.csv",
-    "product_lookup": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Product Lookup.csv",
-    "product_subcategories": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Product Subcategories Lookup.csv",
-    "returns": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Returns Data.csv",
-    "sales_2020": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Sales Data 2020.csv",
-    "sales_2021": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Sales Data 2021.csv",
-    "sales_2022": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/AdventureWorks Sales Data 2022.csv",
-    "unpivot_demo": "C:/Users/Aravind/Desktop/AdventureWorks Raw Data/Product Category Sales (Unpivot Demo).csv"
-}
-
-# Load each CSV file into individual DataFrames with error handling for encoding
-def load_csv(file_path):
-    try:
-        return pd.read_csv(file_path, encoding='utf-8')
-    except UnicodeDecodeError:
-        return pd.read_csv(file_path, encoding='ISO-8859-1')
-
-# Loading the data
-product_lookup = load_csv(csv_files["product_lookup"])
-sales_2020 = load_csv(csv_files["sales_2020"])
-sales_2021 = load_csv(csv_files["sales_2021"])
-sales_2022 = load_csv(csv_files["sales_2022"])
-returns_data = load_csv(csv_files["returns"])
-
-# Step 2: Clean and preprocess data
-product_lookup.columns = product_lookup.columns.str.strip().str.lower()
-sales_2020.columns = sales_2020.columns.str.strip().str.lower()
-sales_2021.columns = sales_2021.columns.str.strip().str.lower()
-sales_2022.columns = sales_2022.columns.str.strip().str.lower()
-returns_data.columns = returns_data.columns.str.strip().str.lower()
-
-# Step 3: Combine Sales Data
-sales_data = pd.concat([sales_2020, sales_2021, sales_2022], ignore_index=True)
-
-# Step 4: Calculate Measures
-# Total Orders: DISTINCTCOUNT('Sales Data'[OrderNumber])
-sales_data['distinct_order'] = sales_data['ordernumber']
-total_orders = sales_data.groupby('productkey')['distinct_order'].nunique()
-
-# Quantity Sold: SUM('Sales Data'[OrderQuantity])
-quantity_sold = sales_data.groupby('productkey')['orderquantity'].sum()
+from starschema import load_sales_model
+from tableprovider import TableProvider, format_rate
 
-# Quantity Returned: SUM('Returns Data'[ReturnQuantity])
-quantity_returned = returns_data.groupby('productkey')['returnquantity'].sum()
+# Step 1: Load the shared star-schema model
+model = load_sales_model()
 
-# Merge sales and product lookup data
-merged_data = pd.merge(sales_data, product_lookup, on="productkey", how="left")
+# Step 2: Calculate Measures
+# Total Orders: DISTINCTCOUNT('Sales Data'[OrderNumber])
+total_orders = model.order_counter().rollup('ProductKey')
 
-# Total Revenue: SUMX('Sales Data', 'Sales Data'[OrderQuantity] * RELATED('Product Lookup'[ProductPrice]))
-merged_data['total_revenue'] = merged_data['orderquantity'] * merged_data['productprice']
+# Quantity Sold: SUM('Sales Data'[OrderQuantity]), Quantity Returned: SUM('Returns Data'[ReturnQuantity])
+# and Total Revenue: SUMX('Sales Data', 'Sales Data'[OrderQuantity] * RELATED('Product Lookup'[ProductPrice]))
+# per product, from the shared return-rate engine
+product_rates = model.return_rates().by_product()
+total_revenue = product_rates['Revenue']
 
 # Return Rate: DIVIDE([Quantity Returned], [Quantity Sold], "No Sales")
-return_rate = (quantity_returned / quantity_sold).fillna("No Sales")
+# Kept numeric so it can be sorted; "No Sales" is applied only to the rows being displayed
+return_rate = product_rates['ReturnRate']
 
-# Step 5: Create a Summary Table
+# Step 3: Create a Summary Table covering every product in the catalog; products without sales
+# have 0 orders and revenue and no return rate ("No Sales")
+product_keys = model.products['ProductKey']
 summary_table = pd.DataFrame({
-    'ProductName': product_lookup.set_index('productkey').loc[total_orders.index, 'productname'],
-    'TotalOrders': total_orders.values,
-    'TotalRevenue': merged_data.groupby('productkey')['total_revenue'].sum().values,
-    'ReturnRate': return_rate.reindex(total_orders.index, fill_value="No Sales").values
+    'ProductName': model.products['ProductName'].values,
+    'TotalOrders': total_orders.reindex(product_keys, fill_value=0).values,
+    'TotalRevenue': total_revenue.reindex(product_keys, fill_value=0.0).values,
+    'ReturnRate': return_rate.reindex(product_keys).values
 }).reset_index(drop=True)
 
-# Select the top 10 products and required columns
-top_10_products = summary_table[['ProductName', 'TotalOrders', 'TotalRevenue', 'ReturnRate']].head(10)
+# Step 4: Serve the table one page at a time; sorting, filtering and paging happen on the server
+products = TableProvider(
+    summary_table,
+    search_columns=['ProductName'],
+    formatters={'ReturnRate': format_rate},
+    page_size=10
+)
+sort_columns = ['TotalOrders', 'TotalRevenue', 'ReturnRate', 'ProductName']
+search_text = ""
+sort_column = 'TotalOrders'
+sort_descending = True
+page_number = 1
+product_page, matching_rows, page_count = products.page(page_number, search_text, sort_column, sort_descending)
+page_info = f"Page {page_number} of {page_count} ({matching_rows} products)"
+
+
+def update_page(state, page_number):
+    window, rows, pages = products.page(page_number, state.search_text, state.sort_column, state.sort_descending)
+    state.page_number = min(max(1, page_number), pages)
+    state.product_page = window
+    state.page_info = f"Page {state.page_number} of {pages} ({rows} products)"
+
 
-# Step 6: Create a Table Visualization in Taipy GUI
-page = tgb.Page(
+# A new filter or sort order starts again from the first page
+def on_filter_change(state, var_name, value):
+    update_page(state, 1)
+
+
+def on_previous(state):
+    update_page(state, state.page_number - 1)
+
+
+def on_next(state):
+    update_page(state, state.page_number + 1)
+
+
+# Step 5: Create a Table Visualization in Taipy GUI
+with tgb.Page() as page:
+    tgb.input("{search_text}", label="Search products", change_delay=300, on_change=on_filter_change)
+    tgb.selector("{sort_column}", lov=sort_columns, dropdown=True, label="Sort by", on_change=on_filter_change)
+    tgb.toggle("{sort_descending}", label="Descending", on_change=on_filter_change)
     tgb.table(
-        "{top_10_products}",  # Data binding
-        title="Top 10 Products",  # Title of the table
+        "{product_page}",  # Data binding: only the visible window is sent to the browser
+        title="Products",  # Title of the table
+        columns=["ProductName", "TotalOrders", "TotalRevenue", "ReturnRate"],
         headers=["Product Name", "Total Orders", "Total Revenue", "Return Rate"],  # Table headers
+        show_all=True,  # The window is already one page
+        sortable=False,  # Sorting is done on the full summary, not on the window
         width="80%",  # Table width
         margin_left="10%"  # Center alignment
     )
-)
+    tgb.button("Previous", on_action=on_previous)
+    tgb.text("{page_info}")
+    tgb.button("Next", on_action=on_next)
 
-# Step 7: Run the Taipy GUI
-gui = tg.Gui(page)
-gui.run()
+# Step 6: Run the Taipy GUI
+if __name__ == "__main__":
+    gui = tg.Gui(page)
+    gui.run()
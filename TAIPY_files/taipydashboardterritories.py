@@ -0,0 +1,77 @@
+import pandas as pd
+import taipy.gui as tg
+import taipy.gui.builder as tgb
+
+from businessmetrics import assign_values
+from starschema import load_sales_model, refresh_sales_model
+from tableprovider import format_rate
+
+# Step 1: Load the shared star-schema model; sales and returns are aligned per month x territory x product
+model = load_sales_model()
+month_labels = [month.strftime("%Y-%m") for month in model.return_rates().cells["Month"].drop_duplicates()]
+month_range = [month_labels[0], month_labels[-1]]
+
+
+# Step 2: Revenue, quantity sold/returned and Return Rate per territory for the selected months.
+# ReturnRate stays a float (NaN without sales) for the chart; the table gets the formatted text
+def territory_values(month_range):
+    rates = load_sales_model().return_rates()
+    start, end = (pd.Timestamp(label) for label in month_range)
+    territories = rates.by_territory(start, end)
+    territories["ReturnRatePercent"] = territories["ReturnRate"] * 100
+    display = territories.assign(ReturnRate=territories["ReturnRate"].map(format_rate))
+    return {"territory_rates": territories, "territory_table": display}
+
+
+values = territory_values(month_range)
+territory_rates = values["territory_rates"]
+territory_table = values["territory_table"]
+
+
+def on_range_change(state, var_name, value):
+    assign_values(state, territory_values(state.month_range))
+
+
+# Step 3: Refresh when a source changed; each client keeps its own month range
+def compute_territories():
+    refresh_sales_model()
+    return {}
+
+
+def on_data_refresh(state, values):
+    on_range_change(state, None, None)
+
+
+# Step 4: Create the Page
+with tgb.Page() as page:
+    tgb.text("# Returns by Territory", mode="md")
+    tgb.slider("{month_range}", lov=month_labels, text_anchor="bottom", on_change=on_range_change)
+    tgb.chart(
+        "{territory_rates}",
+        type="bar",
+        x="Region",
+        y="ReturnRatePercent",
+        title="Return Rate by Territory (%)",
+        width="80%",
+        margin_left="5%"
+    )
+    tgb.chart(
+        "{territory_rates}",
+        type="bar",
+        x="Region",
+        y="Revenue",
+        title="Revenue by Territory",
+        width="80%",
+        margin_left="5%"
+    )
+    tgb.table(
+        "{territory_table}",
+        columns=["Region", "Country", "Continent", "Revenue", "Sold", "Returned", "ReturnRate"],
+        show_all=True,
+        width="80%",
+        margin_left="10%"
+    )
+
+# Step 5: Run the Taipy GUI
+if __name__ == "__main__":
+    tg.Gui(page).run()
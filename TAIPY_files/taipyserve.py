@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+import signal
+import sys
+
+from dataloader import CACHE_DIR, source_signature
+from sharedmodel import attach_sales_model, publish_sales_model
+from starschema import install_sales_model, load_sales_model, model_sources
+
+# Worker processes, the ports they listen on, and the single public port of the proxy in front of them
+WORKERS = int(os.environ.get("ARCHIOT_WORKERS", str(os.cpu_count() or 2)))
+BASE_PORT = int(os.environ.get("ARCHIOT_BASE_PORT", "5001"))
+PUBLIC_PORT = int(os.environ.get("ARCHIOT_PUBLIC_PORT", "5000"))
+NGINX_CONFIG = os.path.join(CACHE_DIR, "nginx-archiot.conf")
+
+
+# Step 1: Each worker attaches to the model in shared memory, then serves the multi-page app
+def run_worker(port, handles, signature):
+    install_sales_model(attach_sales_model(handles), signature)
+    # Imported only now, so the pages pick up the attached model instead of loading their own
+    from taipyapp import create_gui
+    create_gui().run(host="127.0.0.1", port=port, run_browser=False, use_reloader=False,
+                     title="AdventureWorks Dashboards")
+
+
+# Step 2: Taipy keeps per-client state in the worker a browser first connected to and talks to it
+# over Socket.IO, so the proxy must be sticky (ip_hash) and pass WebSocket upgrades through
+def nginx_config(ports, public_port=PUBLIC_PORT):
+    servers = "\n".join(f"    server 127.0.0.1:{port};" for port in ports)
+    return f"""upstream archiot_workers {{
+    ip_hash;
+{servers}
+}}
+
+map $http_upgrade $connection_upgrade {{
+    default upgrade;
+    ''      close;
+}}
+
+server {{
+    listen {public_port};
+
+    location / {{
+        proxy_pass http://archiot_workers;
+        proxy_http_version 1.1;
+        proxy_set_header Upgrade $http_upgrade;
+        proxy_set_header Connection $connection_upgrade;
+        proxy_set_header Host $host;
+        proxy_read_timeout 3600s;
+    }}
+}}
+"""
+
+
+# Step 3: Build the model once, publish it, start the workers and clean up the shared blocks on exit
+def serve(workers=WORKERS, base_port=BASE_PORT):
+    signature = source_signature(model_sources)
+    shared = publish_sales_model(load_sales_model())
+    ports = [base_port + i for i in range(workers)]
+
+    os.makedirs(os.path.dirname(NGINX_CONFIG), exist_ok=True)
+    with open(NGINX_CONFIG, "w", encoding="utf-8") as f:
+        f.write(nginx_config(ports))
+    print(f"Starting {workers} workers on ports {ports[0]}-{ports[-1]}; "
+          f"nginx config for port {PUBLIC_PORT}: {NGINX_CONFIG}")
+
+    # Turn a plain `kill` into a normal exit so the shared blocks are unlinked
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=run_worker, args=(port, shared.handles, signature), name=f"gui-{port}")
+                 for port in ports]
+    try:
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        shared.close()
+
+
+if __name__ == "__main__":
+    serve()
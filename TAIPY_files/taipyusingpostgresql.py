@@ -1,46 +1,62 @@
-import psycopg2
+import os
+
 import pandas as pd
 import taipy.gui as tg
 import taipy.gui.builder as tgb
+from taipy.gui import invoke_long_callback
+
+from pgsource import postgres_source, sqlite_source
+
+# Shared, pooled connection source (set ARCHIOT_SQLITE_DB to use a local SQLite copy instead of PostgreSQL)
+if os.environ.get("ARCHIOT_SQLITE_DB"):
+    source = sqlite_source(os.environ["ARCHIOT_SQLITE_DB"])
+else:
+    source = postgres_source()
 
-# Database connection settings
-db_config = {
-    "dbname": "new_db",
-    "user": "postgres",
-    "password": "Animal@123",
-    "host": "localhost",
-    "port": "5432"
-}
+# Prepared once per pooled connection
+source.register("employees_by_job", """
+    SELECT 
+        j.job_title, 
+        COUNT(e.employee_id) AS employee_count
+    FROM 
+        jobs j
+    LEFT JOIN 
+        employees e 
+    ON 
+        j.job_id = e.job_id
+    GROUP BY 
+        j.job_title
+    ORDER BY 
+        employee_count DESC
+""")
 
-# Fetch data from PostgreSQL database
+
+# Fetch data from PostgreSQL database (results are cached for ARCHIOT_QUERY_TTL seconds)
 def fetch_data():
-    # Establish connection to the database
-    conn = psycopg2.connect(**db_config)
-    query = """
-        SELECT 
-            j.job_title, 
-            COUNT(e.employee_id) AS employee_count
-        FROM 
-            jobs j
-        LEFT JOIN 
-            employees e 
-        ON 
-            j.job_id = e.job_id
-        GROUP BY 
-            j.job_title
-        ORDER BY 
-            employee_count DESC;
-    """
-    # Execute the query and load data into a Pandas DataFrame
-    data = pd.read_sql_query(query, conn)
-    conn.close()
-    return data
-
-# Fetch the aggregated data
-data = fetch_data()
+    return source.query("employees_by_job")
+
+
+# The page starts empty and is filled once the query returns, off the GUI event loop
+data = pd.DataFrame(columns=["job_title", "employee_count"])
+status = "Loading..."
+
+
+def on_data_loaded(state, finished, result):
+    if isinstance(finished, bool):
+        if finished:
+            state.data = result
+            state.status = ""
+        else:
+            state.status = "Query failed"
+
+
+def on_init(state):
+    invoke_long_callback(state, fetch_data, [], on_data_loaded)
+
 
 # Define the Taipy GUI page
-page = tgb.Page(
+with tgb.Page() as page:
+    tgb.text("{status}")
     tgb.chart(
         "{data}",
         type="bar",
@@ -50,7 +66,6 @@ page = tgb.Page(
         x_title="Job Title",
         y_title="Number of Employees",
     )
-)
 
 # Running the Taipy GUI with the page
 tg.Gui(page).run()
@@ -1,42 +1,29 @@
-import pandas as pd
 import taipy.gui as tg  # Correct import for Taipy GUI
 import taipy.gui.builder as tgb
-import matplotlib.pyplot as plt
-import io
-import base64
 
-# Load your CSV dataset
-data = pd.read_csv('C:/Users/Aravind/Downloads/Car_sales.csv')  # Replace with your actual dataset path
-
-# Function to create the bar chart with annotations using Matplotlib
-def create_bar_chart():
-    fig, ax = plt.subplots(figsize=(8, 6))
-    bars = ax.bar(data['Model'], data['Sales_in_thousands'])
-    ax.set_xlabel('Model')
-    ax.set_ylabel('Sales in Thousands')
-    ax.set_title('Sales by Car Model')
-
-    # Add annotations on top of each bar
-    for bar in bars:
-        yval = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width() / 2, yval, round(yval, 2),
-                ha='center', va='bottom', fontsize=10, color='black')
+from charts import annotated_series, bar_label_options
+from dataloader import get_table
 
-    # Save the plot to a BytesIO object to be used in Taipy
-    img_buf = io.BytesIO()
-    plt.savefig(img_buf, format='png')
-    img_buf.seek(0)
-    img_base64 = base64.b64encode(img_buf.read()).decode('utf-8')
+# Load your CSV dataset
+data = get_table('car_sales')  # Path configured in datasources.toml (or ARCHIOT_SOURCE_CAR_SALES)
 
-    return img_base64
+# Bar chart data with annotations: the rounded value of each bar is drawn on top of it by Plotly
+# in the browser, so nothing is rendered to an image on the server
+chart_data = annotated_series(data, 'Model', 'Sales_in_thousands')
 
 # Taipy GUI setup
-# Create the bar chart with annotations using Matplotlib
-img_base64 = create_bar_chart()
-
-# Use tgb.chart() to display a Taipy bar chart and an image with annotations
 page = tgb.Page(
-    tgb.chart("{data}", type="bar", x="Model", y="Sales_in_thousands", title="Sales by Car Model"),
+    tgb.chart(
+        "{chart_data}",
+        type="bar",
+        x="Model",
+        y="Sales_in_thousands",
+        text="label",  # Annotation on top of each bar
+        options="{bar_label_options}",
+        title="Sales by Car Model",
+        x_title="Model",
+        y_title="Sales in Thousands",
+    ),
 )
 
 # Running the Taipy GUI with the page
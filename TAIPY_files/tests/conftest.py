@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The dashboard modules are flat scripts in TAIPY_files and import each other by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
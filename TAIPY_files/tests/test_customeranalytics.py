@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from customeranalytics import CustomerAnalytics, rfm_segments, segment_grid
+
+
+def make_analytics(order_counts, seed=0, key_order=None):
+    rng = np.random.default_rng(seed)
+    keys = np.arange(1, len(order_counts) + 1) if key_order is None else np.asarray(key_order)
+    rows = []
+    order = 0
+    for key, count in zip(keys, order_counts):
+        for _ in range(count):
+            order += 1
+            rows.append({
+                "CustomerKey": key,
+                "OrderNumber": f"SO{order}",
+                "OrderDate": pd.Timestamp("2021-01-01") + pd.Timedelta(days=int(rng.integers(0, 700))),
+                "Revenue": 100.0,
+                "Cost": 60.0,
+            })
+    fact = pd.DataFrame(rows)
+    customers = pd.DataFrame({"CustomerKey": keys, "FirstName": "ann", "LastName": "lee"})
+    return CustomerAnalytics(fact, customers)
+
+
+def test_frequency_score_follows_order_count():
+    counts = [1] * 60 + [2] * 25 + [3] * 8 + [4] * 4 + [5] * 2 + [9] * 1
+    rfm = make_analytics(counts).rfm()
+    by_orders = rfm.groupby("Orders")["F"].unique()
+    # Tied order counts always share a score, and every score is used
+    assert all(len(scores) == 1 for scores in by_orders)
+    assert {orders: scores[0] for orders, scores in by_orders.items()} == {1: 1, 2: 2, 3: 3, 4: 4, 5: 4, 9: 5}
+
+
+def test_scores_do_not_depend_on_customer_key_order():
+    counts = [1] * 30 + [2] * 10 + [3] * 5
+    first = make_analytics(counts).rfm()
+    second = make_analytics(counts, key_order=np.arange(len(counts), 0, -1)).rfm()
+    for rfm in (first, second):
+        assert rfm.groupby("Orders")["F"].nunique().max() == 1
+    assert first.groupby("Orders")["F"].first().equals(second.groupby("Orders")["F"].first())
+
+def test_every_customer_and_cell_has_a_segment():
+    assert not (segment_grid == None).any()  # noqa: E711
+    rfm = make_analytics([1] * 40 + [2] * 20 + [3] * 10 + [6] * 5).rfm()
+    assert rfm["Segment"].notna().all()
+    assert set(rfm["Segment"].cat.categories) == {name for name, _ in rfm_segments}
+    # Segments for repeat customers never hold one-order customers
+    smallest = rfm.groupby("Segment", observed=True)["Orders"].min()
+    for segment in ("Champions", "Loyal", "Potential Loyalists", "At Risk", "Hibernating"):
+        if segment in smallest:
+            assert smallest[segment] >= 2
@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from daxmeasures import DaxError, MeasureSet, parse
+
+measures = {
+    "Total Revenue": "SUMX('Sales Data', 'Sales Data'[OrderQuantity] * RELATED('Product Lookup'[ProductPrice]))",
+    "Quantity Sold": "SUM('Sales Data'[OrderQuantity])",
+    "Quantity Returned": "SUM('Returns Data'[ReturnQuantity])",
+    "Return Rate": 'DIVIDE([Quantity Returned], [Quantity Sold], "No Sales")',
+    "Total Orders": "DISTINCTCOUNT('Sales Data'[OrderNumber])",
+    "Bike Sales": "CALCULATE([Quantity Sold], 'Product Categories Lookup'[CategoryName] = \"Bikes\")",
+    "Bike Returns": "CALCULATE([Quantity Returned], 'Product Categories Lookup'[CategoryName] = \"bikes\")",
+    "Bike Return Rate": "DIVIDE([Bike Returns], [Bike Sales])",
+    "Clothing Via Bikes": "CALCULATE(CALCULATE([Quantity Sold], 'Product Lookup'[CategoryName] = \"Clothing\"), "
+                          "'Product Lookup'[CategoryName] = \"Bikes\")",
+}
+
+
+@pytest.fixture
+def model():
+    products = pd.DataFrame({
+        "ProductKey": [1, 2, 3, 4],
+        "ProductName": ["Road Bike", "Helmet", "Jersey", "Unsold Sock"],
+        "CategoryName": ["Bikes", "Accessories", "Clothing", "Clothing"],
+        "ProductPrice": [1000.0, 30.0, 50.0, 5.0],
+    })
+    territories = pd.DataFrame({"TerritoryKey": [1, 2], "Region": ["North", "South"]})
+    fact = pd.DataFrame({
+        "OrderDate": pd.to_datetime(["2021-01-05", "2021-01-20", "2021-02-03", "2022-03-01", "2022-03-01"]),
+        "OrderNumber": ["SO1", "SO1", "SO2", "SO3", "SO4"],
+        "ProductKey": [1, 2, 3, 1, 2],
+        "TerritoryKey": [1, 1, 2, 2, 1],
+        "OrderQuantity": [1, 2, 3, 2, 1],
+    })
+    fact["StartOfMonth"] = fact["OrderDate"].dt.to_period("M").dt.start_time
+    returns = pd.DataFrame({
+        "ReturnDate": pd.to_datetime(["2021-02-01", "2022-03-10"]),
+        "ProductKey": [1, 3],
+        "TerritoryKey": [1, 2],
+        "ReturnQuantity": [1, 1],
+    })
+    returns["StartOfMonth"] = returns["ReturnDate"].dt.to_period("M").dt.start_time
+    return SimpleNamespace(fact=fact, returns=returns, products=products, territories=territories)
+
+
+def test_totals(model):
+    values = MeasureSet(measures).evaluate(model).iloc[0]
+    assert values["Total Revenue"] == 1000 + 60 + 150 + 2000 + 30
+    assert values["Quantity Sold"] == 9
+    assert values["Total Orders"] == 4
+    assert values["Return Rate"] == pytest.approx(2 / 9)
+    assert values["Bike Sales"] == 3
+    # Text comparisons are case-insensitive
+    assert values["Bike Returns"] == 1
+
+
+def test_inner_calculate_filter_replaces_outer_filter_on_same_column(model):
+    assert MeasureSet(measures).evaluate(model, names=["Clothing Via Bikes"]).iloc[0, 0] == 3
+
+
+def test_grouped_by_column_of_calculate_filter(model):
+    result = MeasureSet(measures).evaluate(model, by="'Product Categories Lookup'[CategoryName]")
+    assert list(result.index) == ["Accessories", "Bikes", "Clothing"]
+    assert result["Quantity Sold"].tolist() == [3, 3, 3]
+    # The filter on CategoryName replaces each row's own CategoryName, as DAX does
+    assert result["Bike Sales"].tolist() == [3, 3, 3]
+    assert result["Bike Returns"].tolist() == [1, 1, 1]
+    assert result["Bike Return Rate"].tolist() == pytest.approx([1 / 3] * 3)
+    # The same physical column reached through another product lookup
+    result = MeasureSet(measures).evaluate(model, names=["Bike Sales"], by="'Product Lookup'[CategoryName]")
+    assert result["Bike Sales"].tolist() == [3, 3, 3]
+
+
+def test_grouped_by_other_column_keeps_filter_and_group(model):
+    result = MeasureSet(measures).evaluate(model, by="'Calendar Lookup'[Year]")
+    assert result["Bike Sales"].tolist() == [1, 2]
+    assert result["Total Orders"].tolist() == [2, 2]
+    result = MeasureSet(measures).evaluate(model, by="'Territory Lookup'[Region]")
+    assert result["Bike Sales"].tolist() == [1, 2]
+    assert result["Bike Returns"].tolist() == [1, 0]
+
+
+def test_filter_with_date_and_in_list(model):
+    measure = MeasureSet({"M": "CALCULATE(SUM('Sales Data'[OrderQuantity]), 'Calendar Lookup'[Date] >= DATE(2022, 1, 1)"
+                               " && 'Product Lookup'[ProductName] IN {\"road bike\", \"Jersey\"})"})
+    assert measure.evaluate(model).iloc[0, 0] == 2
+
+
+def test_divide_by_zero_is_blank_with_display_alternate(model):
+    measure_set = MeasureSet(dict(measures, **{
+        "Sock Return Rate": "CALCULATE([Return Rate], 'Product Lookup'[ProductName] = \"Unsold Sock\")"}))
+    value = measure_set.evaluate(model, names=["Sock Return Rate"]).iloc[0, 0]
+    assert np.isnan(value)
+    assert measure_set.format("Return Rate", value) == "No Sales"
+
+
+def test_shared_subexpressions_are_computed_once(model):
+    measure_set = MeasureSet(measures)
+    measure_set.evaluate(model)
+    assert measure_set.last_plan.reused > 0
+
+
+def test_parse_errors():
+    assert parse("1 + 2 * 3") == ("bin", "+", ("num", 1.0), ("bin", "*", ("num", 2.0), ("num", 3.0)))
+    with pytest.raises(DaxError):
+        MeasureSet({"A": "[B]"})
+    with pytest.raises(DaxError):
+        MeasureSet({"A": "[B]", "B": "[A]"})
+    with pytest.raises(DaxError):
+        MeasureSet({"A": "AVERAGEX('Sales Data', 1)"})
+    with pytest.raises(DaxError):
+        parse("SUM('Sales Data'[OrderQuantity]")
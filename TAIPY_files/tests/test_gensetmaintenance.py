@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gensetmaintenance import empty_state, maintenance_schedule, update_state
+
+
+def make_readings(seed=0, per_asset=120):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for asset in ["DG-1", "DG-2", "DG-3"]:
+        meter = np.cumsum(rng.integers(0, 3, per_asset)).astype("float64")
+        # One meter reset halfway through
+        meter[per_asset // 2:] -= meter[per_asset // 2] - 1
+        frames.append(pd.DataFrame({
+            "Asset ID": asset,
+            "Running Minutes": meter,
+            "Load Percentage (%)": rng.uniform(20, 100, per_asset),
+            "Oil Pressure (psi)": rng.uniform(20, 50, per_asset),
+            "Coolant Temp (C)": rng.uniform(70, 110, per_asset),
+            "Battery Voltage (V)": rng.uniform(11, 13, per_asset),
+        }))
+    # Interleave the assets like the sensor export does
+    return pd.concat(frames).sort_index(kind="stable").reset_index(drop=True)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 97])
+def test_incremental_state_matches_batch(chunk_rows):
+    readings = make_readings()
+    batch = update_state(empty_state(), readings)
+    state = empty_state()
+    for start in range(0, len(readings), chunk_rows):
+        state = update_state(state, readings.iloc[start:start + chunk_rows])
+    pd.testing.assert_frame_equal(state.reindex(batch.index), batch)
+
+
+def test_rate_and_nominal_schedule():
+    readings = pd.DataFrame({
+        "Asset ID": ["DG-1"] * 4,
+        "Running Minutes": [10.0, 12.0, 2.0, 6.0],  # reset before the third reading
+        "Load Percentage (%)": 50.0, "Oil Pressure (psi)": 40.0, "Coolant Temp (C)": 90.0,
+        "Battery Voltage (V)": 12.0,
+    })
+    state = update_state(empty_state(), readings)
+    row = state.loc["DG-1"]
+    assert row["Running Minutes"] == 10 + 2 + 2 + 4
+    assert row["Minutes Per Reading"] == pytest.approx((2 + 2 + 4) / 3)
+    schedule = maintenance_schedule(state, interval=10, due_within=1).iloc[0]
+    assert schedule["Last Scheduled Service"] == 10
+    assert schedule["Minutes To Service"] == 2
+    assert schedule["Readings To Service"] == pytest.approx(round(2 / (8 / 3), 1))
+    assert bool(schedule["Due"])
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensorstream import CsvTail, GroupStats
+
+
+def make_readings(seed=0, rows=500):
+    rng = np.random.default_rng(seed)
+    keys = rng.choice(np.array(["L", "M", "H", "X"], dtype=object), rows)
+    values = rng.normal(50, 10, (rows, 2))
+    return keys, values
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 64, 500])
+def test_chunked_stats_match_batch(chunk_rows):
+    keys, values = make_readings()
+    stats = GroupStats(["x", "y"], alpha=0.05)
+    for start in range(0, len(keys), chunk_rows):
+        stats.update(keys[start:start + chunk_rows], values[start:start + chunk_rows])
+    frame = stats.frame("Key").set_index("Key").sort_index()
+
+    expected = pd.DataFrame(values, columns=["x", "y"]).groupby(keys)
+    for column in ["x", "y"]:
+        grouped = expected[column]
+        np.testing.assert_array_equal(frame["Readings"], grouped.size())
+        np.testing.assert_allclose(frame[f"{column} mean"], grouped.mean(), rtol=1e-12)
+        np.testing.assert_allclose(frame[f"{column} std"], grouped.std(), rtol=1e-12)
+        np.testing.assert_allclose(frame[f"{column} ewm"],
+                                   grouped.apply(lambda s: s.ewm(alpha=0.05).mean().iloc[-1]), rtol=1e-12)
+        np.testing.assert_array_equal(frame[f"{column} last"], grouped.last())
+
+
+def test_capacity_evicts_least_recently_seen():
+    stats = GroupStats(["x"], capacity=2)
+    stats.update(np.array(["a", "b"], dtype=object), np.array([[1.0], [2.0]]))
+    stats.update(np.array(["a", "c", "c"], dtype=object), np.array([[3.0], [4.0], [6.0]]))
+    frame = stats.frame("Key").set_index("Key")
+    assert sorted(frame.index) == ["a", "c"]
+    assert frame.loc["a", "x mean"] == 2.0
+    assert frame.loc["c", "Readings"] == 2 and frame.loc["c", "x mean"] == 5.0
+
+
+def test_tail_waits_for_complete_lines(tmp_path):
+    path = tmp_path / "sensor.csv"
+    path.write_bytes(b"Asset ID,Target\nA1,0\nA2,1\nA3,")
+    tail = CsvTail(str(path))
+    assert [chunk["Asset ID"].tolist() for chunk in tail.read_new()] == [["A1", "A2"]]
+
+    with open(path, "ab") as f:
+        f.write(b"1\nA4,0")
+    # The last line has no newline yet: it is only taken once the file size is unchanged between polls
+    assert [chunk["Asset ID"].tolist() for chunk in tail.read_new()] == [["A3"]]
+    assert [chunk["Asset ID"].tolist() for chunk in tail.read_new()] == [["A4"]]
+    assert list(tail.read_new()) == []
+    assert tail.rows == 4
+
+
+def test_tail_final_takes_last_line(tmp_path):
+    path = tmp_path / "sensor.csv"
+    path.write_bytes(b"Asset ID,Target\nA1,0\nA2,1")
+    tail = CsvTail(str(path))
+    chunks = list(tail.read_new(final=True))
+    assert pd.concat(chunks)["Target"].tolist() == [0.0, 1.0]
@@ -0,0 +1,142 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from dataloader import (CACHE_DIR, detect_encoding, feather, pa, read_json, registry, source_path, wide_files,
+                        write_atomic, write_json)
+from instrumentation import timed
+
+# Long rows produced per chunk; the number of wide rows read at a time is this divided by the
+# number of melted columns, so memory stays flat whether a file has 3 region columns or 3,000
+CHUNK_CELLS = int(os.environ.get("ARCHIOT_UNPIVOT_CHUNK_CELLS", "1000000"))
+
+
+# Step 1: Split the header into the columns kept on every row and the wide value columns.
+# The variable of a wide column is its name without the part the pattern matched ("North Region" -> "North")
+def detect_wide_columns(columns, pattern):
+    matcher = re.compile(pattern, re.IGNORECASE)
+    id_columns = [column for column in columns if not matcher.search(column)]
+    value_columns = [column for column in columns if matcher.search(column)]
+    variables = [matcher.sub("", column).strip() for column in value_columns]
+    return id_columns, value_columns, variables
+
+
+def _wide_options(name):
+    options = registry[name]["unpivot"]
+    if not options:
+        raise ValueError(f"Dataset '{name}' has no [unpivot] options in the source registry")
+    return options
+
+
+# Step 2: Melt one chunk of wide rows without going through DataFrame.melt: the values are read
+# row-major from the 2-D block, ids are repeated per value column and the variable is a fixed
+# dictionary code, so every chunk has the same Arrow schema
+def melt_chunk(chunk, id_columns, value_columns, variables, options, dropna=True):
+    block = chunk[value_columns]
+    try:
+        values = block.to_numpy(dtype="float64").ravel()
+    except (TypeError, ValueError):
+        # Text in a value column (e.g. "n/a") becomes a missing value instead of failing the load
+        values = block.apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64").ravel()
+    width = len(value_columns)
+    codes = np.tile(np.arange(width, dtype=np.int32), len(chunk))
+    keep = ~np.isnan(values) if dropna else np.ones(len(values), dtype=bool)
+    rows = np.repeat(np.arange(len(chunk)), width)[keep]
+
+    date_formats = options.get("dates", {})
+    arrays = {}
+    for column in id_columns:
+        ids = chunk[column]
+        if column in date_formats:
+            arrays[column] = pa.array(pd.to_datetime(ids, format=date_formats[column], errors="coerce")
+                                      .to_numpy()[rows], type=pa.timestamp("ns"))
+        else:
+            arrays[column] = pa.array(ids.astype("string").to_numpy(dtype=object, na_value=None)[rows], type=pa.string())
+    arrays[options["variable"]] = pa.DictionaryArray.from_arrays(pa.array(codes[keep]), pa.array(variables))
+    arrays[options["value"]] = pa.array(values[keep], type=pa.float64())
+    return pa.RecordBatch.from_pydict(arrays)
+
+
+def _long_paths(name):
+    return os.path.join(CACHE_DIR, f"{name}.long.arrow"), os.path.join(CACHE_DIR, f"{name}.long.json")
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+# Step 3: Stream the wide file into an Arrow file in the columnar cache, one record batch per chunk;
+# only one chunk of wide and long rows is in memory at any time
+def unpivot_to_store(name, chunk_cells=CHUNK_CELLS):
+    options = _wide_options(name)
+    path = source_path(name)
+    encoding = detect_encoding(path)
+    header = pd.read_csv(path, encoding=encoding, nrows=0).columns
+    id_columns, value_columns, variables = detect_wide_columns(list(header), options["columns"])
+    if not value_columns:
+        raise ValueError(f"No columns of '{name}' match the unpivot pattern {options['columns']!r}")
+
+    long_path, manifest_path = _long_paths(name)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    chunk_rows = max(1, chunk_cells // len(value_columns))
+    totals = {"wide_rows": 0, "long_rows": 0, "chunks": 0}
+
+    def write(tmp_path):
+        reader = pd.read_csv(path, encoding=encoding, chunksize=chunk_rows, dtype={c: "string" for c in id_columns})
+        writer = None
+        try:
+            for chunk in reader:
+                with timed(f"unpivot {name} chunk") as record:
+                    batch = melt_chunk(chunk, id_columns, value_columns, variables, options)
+                    if writer is None:
+                        writer = pa.ipc.new_file(tmp_path, batch.schema)
+                    writer.write_batch(batch)
+                    record["rows"] = batch.num_rows
+                totals["wide_rows"] += len(chunk)
+                totals["long_rows"] += batch.num_rows
+                totals["chunks"] += 1
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            raise ValueError(f"'{name}' has a header but no rows to unpivot")
+
+    write_atomic(long_path, write)
+    write_json(manifest_path, dict(
+        totals,
+        source=_signature(path),
+        options=options,
+        id_columns=id_columns,
+        variables=variables,
+    ))
+    return long_path
+
+
+def _store_is_fresh(name):
+    long_path, manifest_path = _long_paths(name)
+    manifest = read_json(manifest_path)
+    return (manifest is not None and os.path.exists(long_path)
+            and manifest["source"] == _signature(source_path(name))
+            and manifest["options"] == _wide_options(name))
+
+
+# Step 4: The long table (memory-mapped Arrow, or pandas with the variable as a categorical),
+# re-melted only when the wide file or its unpivot options changed
+def load_long_table(name, as_pandas=True):
+    if feather is None:
+        raise ImportError("pyarrow is required to unpivot wide files into the columnar store")
+    long_path, _ = _long_paths(name)
+    if not _store_is_fresh(name):
+        unpivot_to_store(name)
+    table = feather.read_table(long_path, memory_map=True)
+    return table.to_pandas(split_blocks=True) if as_pandas else table
+
+
+# Melt every wide dataset in the registry into the columnar store
+if __name__ == "__main__":
+    for name in wide_files:
+        table = load_long_table(name, as_pandas=False)
+        print(f"{name}: {table.num_rows:,} long rows -> {_long_paths(name)[0]}")